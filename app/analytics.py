@@ -0,0 +1,371 @@
+import argparse
+import json
+import re
+import sys
+import zlib
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.model_schema import models as db_models
+from app.search import plain_text
+from app.shared_state import get_shared_state
+
+
+# Drift metrics for the "recycled synthetic data" trial
+# A chain is the ordered list of model responses (role == 1) in one chat, each generation having seen the previous one
+# as a source. Every metric compares a generation with the one before it:
+#   similarity      TF-IDF cosine similarity (IDF computed within the chain, so results don't depend on the batch)
+#   jaccard         MinHash estimate of the Jaccard similarity of word 3-gram sets
+#   novelty         share of the generation's word 3-grams that did not appear in the previous generation
+#   drift_from_first  1 - TF-IDF cosine similarity with the first generation
+# All documents of a batch are tokenized once into flat NumPy arrays, every metric is then computed for all pairs at once.
+
+ANALYTICS_VERSION = 1 # bump when a metric changes, cached rows with another version are recomputed
+
+NUM_PERMUTATIONS = 64
+SHINGLE_SIZE = 3
+MINHASH_CHUNK = 1 << 16 # shingles hashed per step, bounds the (chunk x permutations) matrix to a few MB
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_rng = np.random.default_rng(20251117) # fixed seed so MinHash signatures are identical across workers and runs
+_HASH_A = _rng.integers(0, np.iinfo(np.uint64).max, size=NUM_PERMUTATIONS, dtype=np.uint64, endpoint=True) | np.uint64(1) # odd multipliers
+_HASH_B = _rng.integers(0, np.iinfo(np.uint64).max, size=NUM_PERMUTATIONS, dtype=np.uint64, endpoint=True)
+
+
+class _Csr(NamedTuple):
+    # Compressed rows: the entries of document d are indices[indptr[d]:indptr[d + 1]] (sorted, unique) with weights data[...]
+    indptr: np.ndarray
+    indices: np.ndarray
+    data: np.ndarray
+
+
+def _segment_ranges(starts: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    # Concatenation of range(start, start + length) for every segment, without a Python loop
+    total = int(lengths.sum())
+    if total == 0:
+        return np.zeros(0, dtype=np.int64)
+    offsets = np.arange(total, dtype=np.int64) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(starts, lengths) + offsets
+
+
+def _csr_from_pairs(rows: np.ndarray, cols: np.ndarray, num_rows: int, weights: Optional[np.ndarray] = None) -> _Csr:
+    # Sums duplicate (row, col) entries, or counts them when no weights are given
+    width = int(cols.max()) + 1 if cols.size else 1
+    keys, inverse = np.unique(rows.astype(np.int64) * width + cols, return_inverse=True)
+    data = np.bincount(inverse, weights=weights, minlength=keys.size).astype(np.float64)
+    indptr = np.zeros(num_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys // width, minlength=num_rows), out=indptr[1:])
+    return _Csr(indptr, keys % width, data)
+
+
+def _pair_dot(csr: _Csr, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+    # Dot product of rows left[p] and right[p] for every pair p, as one sorted-key intersection
+    if left.size == 0:
+        return np.zeros(0)
+    width = int(csr.indices.max()) + 1 if csr.indices.size else 1
+
+    def gather(docs):
+        lengths = csr.indptr[docs + 1] - csr.indptr[docs]
+        positions = _segment_ranges(csr.indptr[docs], lengths)
+        pair_ids = np.repeat(np.arange(docs.size, dtype=np.int64), lengths)
+        return pair_ids * width + csr.indices[positions], csr.data[positions]
+
+    left_keys, left_values = gather(left)
+    right_keys, right_values = gather(right)
+    shared, left_idx, right_idx = np.intersect1d(left_keys, right_keys, assume_unique=True, return_indices=True)
+    return np.bincount(shared // width, weights=left_values[left_idx] * right_values[right_idx], minlength=left.size)
+
+
+class DocumentBatch:
+    def __init__(self, texts: Sequence[str], groups: Sequence[int]):
+        # 'groups' partitions the documents (one group per chain), IDF is computed within each group
+        self.size = len(texts)
+        words: List[str] = []
+        doc_lengths = np.zeros(self.size, dtype=np.int64)
+        for doc, text in enumerate(texts):
+            tokens = _WORD_RE.findall(plain_text(text).lower())
+            words.extend(tokens)
+            doc_lengths[doc] = len(tokens)
+
+        # dict.fromkeys/map keep the per-word work in C, the only Python-level loop left is once per distinct word
+        vocabulary = {word: index for index, word in enumerate(dict.fromkeys(words))}
+        tokens = np.fromiter(map(vocabulary.__getitem__, words), dtype=np.int64, count=len(words))
+        docs = np.repeat(np.arange(self.size, dtype=np.int64), doc_lengths)
+        # Vocabulary ids depend on the batch, CRC32 of the word does not
+        word_hashes = np.fromiter((zlib.crc32(word.encode("utf-8")) for word in vocabulary), dtype=np.uint64, count=len(vocabulary))
+
+        self.lengths = doc_lengths
+        self.tfidf = self._build_tfidf(tokens, docs, np.asarray(groups, dtype=np.int64))
+        self.shingles, shingle_hashes = self._build_shingles(word_hashes[tokens], docs)
+        self.signatures = self._build_signatures(self.shingles, shingle_hashes)
+
+    def _build_tfidf(self, tokens: np.ndarray, docs: np.ndarray, groups: np.ndarray) -> _Csr:
+        counts = _csr_from_pairs(docs, tokens, self.size)
+        entry_docs = np.repeat(np.arange(self.size), np.diff(counts.indptr))
+        entry_groups = groups[entry_docs]
+
+        # Document frequency of each (group, term), broadcast back onto every entry
+        width = int(counts.indices.max()) + 1 if counts.indices.size else 1
+        group_terms, inverse = np.unique(entry_groups * width + counts.indices, return_inverse=True)
+        df = np.bincount(inverse, minlength=group_terms.size)[inverse]
+        group_sizes = np.bincount(groups)[entry_groups]
+
+        # Sublinear TF, smoothed IDF, then L2-normalize so a dot product is a cosine similarity
+        weights = (1.0 + np.log(counts.data)) * (np.log((1.0 + group_sizes) / (1.0 + df)) + 1.0)
+        norms = np.sqrt(np.bincount(entry_docs, weights=weights ** 2, minlength=self.size))
+        weights = weights / np.where(norms > 0, norms, 1.0)[entry_docs]
+        return _Csr(counts.indptr, counts.indices, weights)
+
+    def _build_shingles(self, token_hashes: np.ndarray, docs: np.ndarray) -> Tuple[_Csr, np.ndarray]:
+        # Returns the per-document shingle sets (dense ids) and the stable hash of each shingle id
+        n = token_hashes.size - SHINGLE_SIZE + 1
+        if n <= 0:
+            empty = _Csr(np.zeros(self.size + 1, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0))
+            return empty, np.zeros(0, dtype=np.uint64)
+        # A shingle is valid only if all of its words come from the same document
+        valid = docs[:n] == docs[SHINGLE_SIZE - 1:]
+        mixed = np.zeros(n, dtype=np.uint64)
+        for offset in range(SHINGLE_SIZE):
+            mixed = mixed * np.uint64(1000003) ^ token_hashes[offset:offset + n]
+        shingle_hashes, shingle_ids = np.unique(mixed[valid], return_inverse=True)
+        shingle_csr = _csr_from_pairs(docs[:n][valid], shingle_ids.reshape(-1), self.size)
+        return _Csr(shingle_csr.indptr, shingle_csr.indices, np.ones_like(shingle_csr.data)), shingle_hashes # sets, not counts
+
+    def _build_signatures(self, shingles: _Csr, shingle_hashes: np.ndarray) -> np.ndarray:
+        # Stored permutation-major (NUM_PERMUTATIONS x documents) so every reduction runs over contiguous memory
+        signatures = np.full((NUM_PERMUTATIONS, self.size), np.iinfo(np.uint32).max, dtype=np.uint32)
+        values = shingle_hashes[shingles.indices]
+        entry_docs = np.repeat(np.arange(self.size), np.diff(shingles.indptr))
+        for start in range(0, values.size, MINHASH_CHUNK):
+            chunk = values[start:start + MINHASH_CHUNK]
+            chunk_docs = entry_docs[start:start + MINHASH_CHUNK]
+            # Multiply-shift hashing: (a * x + b) mod 2^64, keeping the high 32 bits, no integer division needed
+            hashed = ((_HASH_A[:, None] * chunk[None, :] + _HASH_B[:, None]) >> np.uint64(32)).astype(np.uint32)
+            # Entries are sorted by document, so each document is one contiguous segment of the chunk
+            segment_starts = np.flatnonzero(np.r_[True, chunk_docs[1:] != chunk_docs[:-1]])
+            segment_docs = chunk_docs[segment_starts]
+            minimums = np.minimum.reduceat(hashed, segment_starts, axis=1)
+            signatures[:, segment_docs] = np.minimum(signatures[:, segment_docs], minimums)
+        return signatures
+
+    def cosine(self, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+        return np.clip(_pair_dot(self.tfidf, left, right), 0.0, 1.0)
+
+    def jaccard(self, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+        estimate = (self.signatures[:, left] == self.signatures[:, right]).mean(axis=0)
+        # Two shingle-less documents would otherwise "agree" on every empty slot
+        left_empty = self.shingles.indptr[left + 1] == self.shingles.indptr[left]
+        right_empty = self.shingles.indptr[right + 1] == self.shingles.indptr[right]
+        return np.where(left_empty | right_empty, (left_empty & right_empty).astype(np.float64), estimate)
+
+    def novelty(self, previous: np.ndarray, current: np.ndarray) -> np.ndarray:
+        current_sizes = np.diff(self.shingles.indptr)[current].astype(np.float64)
+        shared = _pair_dot(self.shingles, previous, current)
+        return np.where(current_sizes > 0, 1.0 - shared / np.where(current_sizes > 0, current_sizes, 1.0), 0.0)
+
+
+def analyze_chains(chains: Sequence[Sequence[Tuple[int, str]]]) -> List[List[Dict]]:
+    # 'chains' holds, per chat, the (message_id, content) of each generation in order. Returns per-generation metrics.
+    texts, groups, message_ids = [], [], []
+    chain_starts = []
+    for group, chain in enumerate(chains):
+        chain_starts.append(len(texts))
+        for message_id, content in chain:
+            texts.append(content)
+            groups.append(group)
+            message_ids.append(message_id)
+
+    batch = DocumentBatch(texts, groups)
+    doc_groups = np.asarray(groups, dtype=np.int64)
+    first_docs = np.asarray(chain_starts, dtype=np.int64)[doc_groups] if texts else np.zeros(0, dtype=np.int64)
+    current = np.arange(len(texts), dtype=np.int64)
+    has_previous = current > first_docs
+    previous = np.where(has_previous, current - 1, current)
+
+    similarity = batch.cosine(previous, current)
+    jaccard = batch.jaccard(previous, current)
+    novelty = batch.novelty(previous, current)
+    drift = 1.0 - batch.cosine(first_docs, current)
+
+    results = [[] for _ in chains]
+    for doc in range(len(texts)):
+        results[groups[doc]].append({
+            "generation": int(doc - first_docs[doc]),
+            "message_id": message_ids[doc],
+            "words": int(batch.lengths[doc]),
+            "similarity": round(float(similarity[doc]), 4) if has_previous[doc] else None,
+            "jaccard": round(float(jaccard[doc]), 4) if has_previous[doc] else None,
+            "novelty": round(float(novelty[doc]), 4) if has_previous[doc] else None,
+            "drift_from_first": round(float(drift[doc]), 4),
+        })
+    return results
+
+
+def compare_models(prompt_responses: Iterable[Tuple[str, int, str]]) -> List[Dict]:
+    # Cross-model drift: responses (prompt, model_id, response) are grouped by identical first prompt, and every pair of
+    # responses from two different models to the same prompt is compared. Returns averages per model pair.
+    by_prompt: Dict[str, List[Tuple[int, str]]] = defaultdict(list)
+    for prompt, model_id, response in prompt_responses:
+        by_prompt[" ".join(_WORD_RE.findall(plain_text(prompt).lower()))].append((model_id, response))
+
+    texts, groups, model_ids, left, right = [], [], [], [], []
+    for group, responses in enumerate(r for r in by_prompt.values() if len({m for m, _ in r}) > 1):
+        start = len(texts)
+        for model_id, response in responses:
+            texts.append(response)
+            groups.append(group)
+            model_ids.append(model_id)
+        for i in range(start, len(texts)):
+            for j in range(i + 1, len(texts)):
+                if model_ids[i] != model_ids[j]:
+                    left.append(i)
+                    right.append(j)
+    if not left:
+        return []
+
+    batch = DocumentBatch(texts, groups)
+    left, right = np.asarray(left), np.asarray(right)
+    similarity = batch.cosine(left, right)
+    jaccard = batch.jaccard(left, right)
+
+    ids = np.asarray(model_ids)
+    low, high = np.minimum(ids[left], ids[right]), np.maximum(ids[left], ids[right])
+    pairs, inverse = np.unique(np.stack([low, high], axis=1), axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    counts = np.bincount(inverse)
+    mean_similarity = np.bincount(inverse, weights=similarity) / counts
+    mean_jaccard = np.bincount(inverse, weights=jaccard) / counts
+    return [
+        {
+            "model_a": int(a),
+            "model_b": int(b),
+            "pairs": int(counts[k]),
+            "similarity": round(float(mean_similarity[k]), 4),
+            "jaccard": round(float(mean_jaccard[k]), 4),
+        }
+        for k, (a, b) in enumerate(pairs)
+    ]
+
+
+def _generations(db: Session, chat_ids: List[int]) -> Dict[int, List[Tuple[int, str]]]:
+    stmt = (
+        select(db_models.ChatMessage.chat_id, db_models.ChatMessage.id, db_models.ChatMessage.content)
+        .where(db_models.ChatMessage.chat_id.in_(chat_ids), db_models.ChatMessage.role == 1)
+        .order_by(db_models.ChatMessage.chat_id, db_models.ChatMessage.id)
+    )
+    chains: Dict[int, List[Tuple[int, str]]] = {chat_id: [] for chat_id in chat_ids}
+    for chat_id, message_id, content in db.execute(stmt):
+        chains[chat_id].append((message_id, content))
+    return chains
+
+
+def get_chat_analytics(db: Session, chat_ids: List[int]) -> Dict[int, List[Dict]]:
+    # Cached per chat in 'chat_analytics' (saved chats are immutable), only the missing chats are computed, in one batch
+    cached = db.execute(
+        select(db_models.ChatAnalytics).where(
+            db_models.ChatAnalytics.chat_id.in_(chat_ids),
+            db_models.ChatAnalytics.version == ANALYTICS_VERSION,
+        )
+    ).scalars().all()
+    results = {row.chat_id: json.loads(row.metrics) for row in cached}
+
+    missing = [chat_id for chat_id in chat_ids if chat_id not in results]
+    if missing:
+        chains = _generations(db, missing)
+        rows = []
+        for chat_id, metrics in zip(missing, analyze_chains([chains[chat_id] for chat_id in missing])):
+            results[chat_id] = metrics
+            rows.append({"chat_id": chat_id, "version": ANALYTICS_VERSION, "metrics": json.dumps(metrics)})
+        _store_analytics(db, rows)
+        db.commit()
+    return results
+
+
+def _store_analytics(db: Session, rows: List[Dict]) -> None:
+    # Upsert: two first requests for the same chat may both compute it, the later write wins instead of failing
+    # on the primary key. Also replaces rows cached with an older ANALYTICS_VERSION.
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    stmt = insert(db_models.ChatAnalytics).values(rows)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[db_models.ChatAnalytics.chat_id],
+        set_={"version": stmt.excluded.version, "metrics": stmt.excluded.metrics, "computed_at": func.now()},
+    ))
+
+
+MODEL_COMPARISON_CACHE_KEY = f"analytics:models:v{ANALYTICS_VERSION}"
+MODEL_COMPARISON_TTL = 300 # seconds, the gallery changes slowly and every public chat is re-read on a miss
+
+
+def public_model_comparison(db: Session) -> List[Dict]:
+    # Cached in the shared state so every worker reuses one computation
+    state = get_shared_state()
+    cached = state.get(MODEL_COMPARISON_CACHE_KEY)
+    if cached is not None:
+        return json.loads(cached)
+    result = _public_model_comparison(db)
+    state.set(MODEL_COMPARISON_CACHE_KEY, json.dumps(result), ttl=MODEL_COMPARISON_TTL)
+    return result
+
+
+def _public_model_comparison(db: Session) -> List[Dict]:
+    # First prompt and first response of every public chat, two rows per chat regardless of transcript length
+    first_messages = (
+        select(db_models.ChatMessage.chat_id, db_models.ChatMessage.role, func.min(db_models.ChatMessage.id).label("id"))
+        .join(db_models.Chat, db_models.Chat.id == db_models.ChatMessage.chat_id)
+        .where(db_models.Chat.is_public.is_(True))
+        .group_by(db_models.ChatMessage.chat_id, db_models.ChatMessage.role)
+        .subquery()
+    )
+    stmt = (
+        select(db_models.Chat.id, db_models.Chat.model_id, db_models.ChatMessage.role, db_models.ChatMessage.content)
+        .join(first_messages, db_models.ChatMessage.id == first_messages.c.id)
+        .join(db_models.Chat, db_models.Chat.id == db_models.ChatMessage.chat_id)
+    )
+    firsts: Dict[int, Dict] = defaultdict(dict)
+    for chat_id, model_id, role, content in db.execute(stmt):
+        firsts[chat_id]["model_id"] = model_id
+        firsts[chat_id][role] = content
+    return compare_models(
+        (first[0], first["model_id"], first[1]) for first in firsts.values() if 0 in first and 1 in first
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    # Offline analysis of an export: python -m app.analytics trials.ndjson > drift.ndjson
+    parser = argparse.ArgumentParser(description="Compute drift metrics for every chat in an NDJSON export (see app/export.py).")
+    parser.add_argument("export", help="NDJSON file produced by 'python -m app.export', '-' for stdin")
+    parser.add_argument("--compare-models", action="store_true", help="Also print cross-model averages for identical prompts")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.export == "-" else open(args.export, encoding="utf-8")
+    chats = []
+    with source:
+        for line in source:
+            record = json.loads(line)
+            if record.get("type") == "chat":
+                chats.append(record)
+
+    chains = [[(m["id"], m["content"]) for m in chat["messages"] if m["role"] == 1] for chat in chats]
+    for chat, metrics in zip(chats, analyze_chains(chains)):
+        print(json.dumps({"type": "chat_drift", "chat_id": chat["id"], "model_id": chat["model_id"], "generations": metrics}))
+
+    if args.compare_models:
+        responses = []
+        for chat in chats:
+            prompt = next((m["content"] for m in chat["messages"] if m["role"] == 0), None)
+            response = next((m["content"] for m in chat["messages"] if m["role"] == 1), None)
+            if prompt is not None and response is not None:
+                responses.append((prompt, chat["model_id"], response))
+        for row in compare_models(responses):
+            print(json.dumps({"type": "model_drift", **row}))
+
+
+if __name__ == "__main__":
+    main()
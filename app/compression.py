@@ -0,0 +1,241 @@
+import argparse
+import gzip
+import os
+import stat
+import zlib
+from mimetypes import guess_type
+from typing import Optional, Tuple
+
+from fastapi.staticfiles import StaticFiles
+from sqlalchemy import text, update
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError: # optional, only gzip is negotiated when it is not installed
+    brotli = None
+
+from app.model_schema import models as db_models
+from app.model_schema.compressed import is_encoded
+from app.model_schema.database import SessionLocal, engine
+
+
+# Transfer compression
+# - CompressionMiddleware: negotiates br/gzip for API responses, including streamed ones (the NDJSON export)
+# - PrecompressedStaticFiles: serves 'file.br' / 'file.gz' next to a static file when the client accepts it
+# Storage compression of 'ChatMessage.content' lives in app/model_schema/compressed.py, its migration is at the bottom.
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5 # per-request compression, higher qualities cost more CPU than they save in transfer
+STATIC_BROTLI_QUALITY = 11 # static files are compressed once, so use the best ratio
+STATIC_SUFFIXES = (".css", ".js", ".html", ".svg", ".json", ".txt")
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+def negotiate_encoding(headers: Headers) -> Optional[str]:
+    accepted = {}
+    for part in headers.get("accept-encoding", "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31) # wbits=31 -> gzip container
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        # Streamed chunks are flushed so the client receives each one as soon as it is produced
+        if self.encoding == "br":
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if final else self._brotli.flush())
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 1024, path_prefixes: Tuple[str, ...] = ("/api/",)):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.path_prefixes = path_prefixes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefixes):
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate_encoding(Headers(scope=scope))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(raw=start_message["headers"])
+                # Small single-chunk bodies and already-encoded responses go out untouched
+                if "content-encoding" in headers or (not more_body and len(body) < self.minimum_size):
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                compressor = _Compressor(encoding)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if "content-length" in headers:
+                    del headers["content-length"]
+                if not more_body:
+                    compressed = compressor.compress(body, final=True)
+                    headers["Content-Length"] = str(len(compressed))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+                await send(start_message)
+
+            await send({"type": "http.response.body", "body": compressor.compress(body, final=not more_body), "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    async def get_response(self, path: str, scope):
+        encoding = negotiate_encoding(Headers(scope=scope))
+        if encoding is not None:
+            # The copies are only refreshed on startup, an asset edited since then is served uncompressed until the next one
+            _, source_stat = self.lookup_path(path)
+            full_path, stat_result = self.lookup_path(path + ENCODING_SUFFIXES[encoding])
+            if (
+                source_stat is not None and stat.S_ISREG(source_stat.st_mode)
+                and stat_result is not None and stat.S_ISREG(stat_result.st_mode)
+                and stat_result.st_mtime >= source_stat.st_mtime
+            ):
+                response = self.file_response(full_path, stat_result, scope)
+                response.headers["Content-Type"] = guess_type(path)[0] or "text/plain"
+                response.headers["Content-Encoding"] = encoding
+                response.headers.add_vary_header("Accept-Encoding")
+                return response
+        response = await super().get_response(path, scope)
+        response.headers.add_vary_header("Accept-Encoding")
+        return response
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    # Several workers may precompress at startup, a reader must never see a half-written file
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def precompress_static(directory: str) -> int:
+    # Writes 'name.gz' (and 'name.br' when brotli is installed) next to every text asset that changed since the last run
+    written = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if not name.endswith(STATIC_SUFFIXES):
+                continue
+            source = os.path.join(root, name)
+            source_mtime = os.stat(source).st_mtime
+            targets = {"gzip": source + ".gz"}
+            if brotli is not None:
+                targets["br"] = source + ".br"
+            stale = [e for e, target in targets.items() if not os.path.exists(target) or os.stat(target).st_mtime < source_mtime]
+            if not stale:
+                continue
+            with open(source, "rb") as f:
+                data = f.read()
+            for encoding in stale:
+                if encoding == "br":
+                    compressed = brotli.compress(data, quality=STATIC_BROTLI_QUALITY)
+                else:
+                    compressed = gzip.compress(data, compresslevel=9, mtime=0)
+                _write_atomic(targets[encoding], compressed)
+                written += 1
+    return written
+
+
+def migrate_message_content(chunk_size: int = 500, vacuum: bool = False) -> int:
+    # Rewrites every 'chatmessages.content' row written before CompressedText into the compressed format.
+    # Safe to re-run: rows that are already encoded are skipped. On Postgres the column itself is converted to BYTEA
+    # by init_db (app/model_schema/upgrade.py), which has to happen before the app serves any save.
+    table = db_models.ChatMessage.__table__
+    rewritten = 0
+    last_id = 0
+    db = SessionLocal()
+    try:
+        while True:
+            # Raw SQL so the stored value comes back undecoded
+            rows = db.execute(
+                text("SELECT id, content FROM chatmessages WHERE id > :last_id ORDER BY id LIMIT :limit"),
+                {"last_id": last_id, "limit": chunk_size},
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            legacy = [
+                {"message_id": message_id, "content": content if isinstance(content, str) else bytes(content).decode("utf-8")}
+                for message_id, content in rows
+                if not is_encoded(content)
+            ]
+            for row in legacy:
+                db.execute(
+                    update(table).where(table.c.id == row["message_id"]).values(content=row["content"])
+                )
+            db.commit()
+            rewritten += len(legacy)
+    finally:
+        db.close()
+
+    if vacuum and engine.dialect.name == "sqlite":
+        # SQLite only returns freed pages to the filesystem on VACUUM
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("VACUUM"))
+    return rewritten
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Compression maintenance tasks.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate = commands.add_parser("migrate", help="Compress chat message rows saved before compressed storage existed")
+    migrate.add_argument("--chunk-size", type=int, default=500)
+    migrate.add_argument("--vacuum", action="store_true", help="SQLite: VACUUM afterwards so the database file shrinks")
+    static = commands.add_parser("precompress", help="Write .gz/.br copies of the static assets")
+    static.add_argument("directory", nargs="?", default="app/static")
+    args = parser.parse_args(argv)
+
+    engine.echo = False
+    if args.command == "migrate":
+        print(f"Compressed {migrate_message_content(args.chunk_size, args.vacuum)} message rows")
+    else:
+        print(f"Wrote {precompress_static(args.directory)} precompressed files")
+
+
+# python -m app.compression migrate --vacuum
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+import argparse
+import json
+import os
+import sys
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import Session
+
+from app import models_list
+from app.model_schema import models as db_models
+from app.model_schema.database import SessionLocal, engine
+
+
+# Bulk export of trial data for offline analysis
+# Chats are read in keyset-paginated chunks ('WHERE id > last_id ORDER BY id LIMIT n'), and each chunk's messages and
+# highlights are fetched with one IN query each, so at most one chunk of rows is ever held in memory no matter how
+# many chats are exported. Output is NDJSON (one record per line), or Parquet files when pyarrow is installed.
+
+DEFAULT_CHUNK_SIZE = 200
+VISIBILITY_CHOICES = ("all", "public", "private")
+
+CHAT_COLUMNS = (
+    db_models.Chat.id,
+    db_models.Chat.owner_id,
+    db_models.Chat.title,
+    db_models.Chat.slug,
+    db_models.Chat.model_id,
+    db_models.Chat.is_public,
+    db_models.Chat.anonymous,
+    db_models.Chat.likes,
+    db_models.Chat.created_at,
+    db_models.Chat.published_at,
+)
+
+
+def _serialize(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _chat_filters(
+    owner_id: Optional[int],
+    model_id: Optional[int],
+    since: Optional[datetime],
+    until: Optional[datetime],
+    visibility: str,
+) -> list:
+    filters = []
+    if owner_id is not None:
+        # API exports are limited to what the user could already read one chat at a time: their own chats and public ones
+        filters.append(or_(db_models.Chat.owner_id == owner_id, db_models.Chat.is_public.is_(True)))
+    if model_id is not None:
+        filters.append(db_models.Chat.model_id == model_id)
+    if since is not None:
+        filters.append(db_models.Chat.created_at >= since)
+    if until is not None:
+        filters.append(db_models.Chat.created_at < until)
+    if visibility == "public":
+        filters.append(db_models.Chat.is_public.is_(True))
+    elif visibility == "private":
+        filters.append(db_models.Chat.is_public.is_(False))
+    return filters
+
+
+def iter_chat_chunks(
+    db: Session,
+    owner_id: Optional[int] = None,
+    model_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    visibility: str = "all",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[List[Dict]]:
+    filters = _chat_filters(owner_id, model_id, since, until, visibility)
+    last_id = 0
+    while True:
+        chat_rows = db.execute(
+            select(*CHAT_COLUMNS)
+            .where(and_(db_models.Chat.id > last_id, *filters))
+            .order_by(db_models.Chat.id)
+            .limit(chunk_size)
+        ).mappings().all()
+        if not chat_rows:
+            return
+        last_id = chat_rows[-1]["id"]
+
+        chats = {}
+        for row in chat_rows:
+            chat = {key: _serialize(value) for key, value in row.items()}
+            model = models_list.get(chat["model_id"])
+            chat["model_name"] = model["pretty_name"] if model else None
+            chat["messages"] = []
+            chats[chat["id"]] = chat
+
+        messages = {}
+        message_rows = db.execute(
+            select(
+                db_models.ChatMessage.id,
+                db_models.ChatMessage.chat_id,
+                db_models.ChatMessage.role,
+                db_models.ChatMessage.content,
+            )
+            .where(db_models.ChatMessage.chat_id.in_(chats.keys()))
+            .order_by(db_models.ChatMessage.chat_id, db_models.ChatMessage.id)
+        ).mappings()
+        for row in message_rows:
+            chat_messages = chats[row["chat_id"]]["messages"]
+            message = dict(row, position=len(chat_messages), highlights=[])
+            chat_messages.append(message)
+            messages[message["id"]] = message
+
+        if messages:
+            highlight_rows = db.execute(
+                select(
+                    db_models.Highlight.id,
+                    db_models.Highlight.chatmessage_id,
+                    db_models.Highlight.starting_index,
+                    db_models.Highlight.ending_index,
+                    db_models.Highlight.comment,
+                )
+                .where(db_models.Highlight.chatmessage_id.in_(messages.keys()))
+                .order_by(db_models.Highlight.id)
+            ).mappings()
+            for row in highlight_rows:
+                messages[row["chatmessage_id"]]["highlights"].append(dict(row))
+
+        yield list(chats.values())
+
+
+def iter_usage_chunks(
+    db: Session,
+    user_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[List[Dict]]:
+    filters = []
+    if user_id is not None:
+        filters.append(db_models.RateLimiting.user_id == user_id)
+    if since is not None:
+        filters.append(db_models.RateLimiting.date >= since.date())
+    if until is not None:
+        filters.append(db_models.RateLimiting.date < until.date())
+
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(
+                db_models.RateLimiting.id,
+                db_models.RateLimiting.user_id,
+                db_models.RateLimiting.date,
+                db_models.RateLimiting.tokens,
+                db_models.RateLimiting.num_messages,
+            )
+            .where(and_(db_models.RateLimiting.id > last_id, *filters))
+            .order_by(db_models.RateLimiting.id)
+            .limit(chunk_size)
+        ).mappings().all()
+        if not rows:
+            return
+        last_id = rows[-1]["id"]
+        yield [{key: _serialize(value) for key, value in row.items()} for row in rows]
+
+
+def iter_ndjson(
+    owner_id: Optional[int] = None,
+    model_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    visibility: str = "all",
+    include_usage: bool = True,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    # Owns its session because a StreamingResponse keeps iterating after the request's 'get_db' session is closed
+    db = SessionLocal()
+    try:
+        for chunk in iter_chat_chunks(db, owner_id, model_id, since, until, visibility, chunk_size):
+            yield "".join(json.dumps({"type": "chat", **chat}) + "\n" for chat in chunk).encode("utf-8")
+        if include_usage:
+            for chunk in iter_usage_chunks(db, owner_id, since, until, chunk_size):
+                yield "".join(json.dumps({"type": "usage", **usage}) + "\n" for usage in chunk).encode("utf-8")
+    finally:
+        db.close()
+
+
+def parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def write_parquet(
+    out_dir: str,
+    model_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    visibility: str = "all",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> Dict[str, int]:
+    # One file per table (chats, messages, highlights, usage), every chunk becomes a row group so memory stays flat
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schemas = {
+        "chats": pa.schema([
+            ("id", pa.int64()), ("owner_id", pa.int64()), ("title", pa.string()), ("slug", pa.string()),
+            ("model_id", pa.int64()), ("model_name", pa.string()), ("is_public", pa.bool_()), ("anonymous", pa.bool_()),
+            ("likes", pa.int64()), ("created_at", pa.string()), ("published_at", pa.string()),
+        ]),
+        "messages": pa.schema([
+            ("id", pa.int64()), ("chat_id", pa.int64()), ("position", pa.int64()), ("role", pa.int64()), ("content", pa.string()),
+        ]),
+        "highlights": pa.schema([
+            ("id", pa.int64()), ("chatmessage_id", pa.int64()), ("chat_id", pa.int64()),
+            ("starting_index", pa.int64()), ("ending_index", pa.int64()), ("comment", pa.string()),
+        ]),
+        "usage": pa.schema([
+            ("id", pa.int64()), ("user_id", pa.int64()), ("date", pa.string()), ("tokens", pa.int64()), ("num_messages", pa.int64()),
+        ]),
+    }
+    os.makedirs(out_dir, exist_ok=True)
+    writers = {name: pq.ParquetWriter(os.path.join(out_dir, f"{name}.parquet"), schema) for name, schema in schemas.items()}
+    counts = {name: 0 for name in schemas}
+
+    def write(name: str, rows: List[Dict]) -> None:
+        if rows:
+            writers[name].write_table(pa.Table.from_pylist(rows, schema=schemas[name]))
+            counts[name] += len(rows)
+
+    db = SessionLocal()
+    try:
+        for chunk in iter_chat_chunks(db, None, model_id, since, until, visibility, chunk_size):
+            messages, highlights = [], []
+            for chat in chunk:
+                for message in chat.pop("messages"):
+                    for highlight in message.pop("highlights"):
+                        highlights.append(dict(highlight, chat_id=chat["id"]))
+                    messages.append(message)
+            write("chats", chunk)
+            write("messages", messages)
+            write("highlights", highlights)
+        for chunk in iter_usage_chunks(db, None, since, until, chunk_size):
+            write("usage", chunk)
+    finally:
+        db.close()
+        for writer in writers.values():
+            writer.close()
+    return counts
+
+
+def _parse_datetime(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Export chats, messages, highlights and usage for offline analysis.")
+    parser.add_argument("--format", choices=("ndjson", "parquet"), default="ndjson")
+    parser.add_argument("--out", required=True, help="NDJSON: output file ('-' for stdout). Parquet: output directory.")
+    parser.add_argument("--model-id", type=int, default=None)
+    parser.add_argument("--since", type=_parse_datetime, default=None, help="ISO date, inclusive (by chat creation)")
+    parser.add_argument("--until", type=_parse_datetime, default=None, help="ISO date, exclusive (by chat creation)")
+    parser.add_argument("--visibility", choices=VISIBILITY_CHOICES, default="all")
+    parser.add_argument("--no-usage", action="store_true", help="NDJSON only: skip the per-user daily usage records")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+    engine.echo = False # SQL echo goes to stdout and would corrupt '--out -'
+
+    if args.format == "parquet":
+        if not parquet_available():
+            parser.error("Parquet export requires pyarrow ('pip install pyarrow')")
+        counts = write_parquet(args.out, args.model_id, args.since, args.until, args.visibility, args.chunk_size)
+        print(", ".join(f"{name}: {count}" for name, count in counts.items()))
+        return
+
+    lines = iter_ndjson(
+        model_id=args.model_id,
+        since=args.since,
+        until=args.until,
+        visibility=args.visibility,
+        include_usage=not args.no_usage,
+        chunk_size=args.chunk_size,
+    )
+    if args.out == "-":
+        for block in lines:
+            sys.stdout.buffer.write(block)
+        return
+    with open(args.out, "wb") as f:
+        for block in lines:
+            f.write(block)
+
+
+# python -m app.export --out trials.ndjson --visibility public
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import html
+import re
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.model_schema import models as db_models
+
+
+# Server-side highlight index
+# Highlights are half-open [starting_index, ending_index) ranges into a message's stored HTML. The index is built per
+# request from the rows that can overlap the queried window (at most MAX_HIGHLIGHTS_PER_MESSAGE), sorted by start, and
+# answers what the client does in 'adjustHighlightIndices' and 'applyHighlightsToHtml'.
+# Offsets are the ones the browser computes ('getHtmlIndicies'): JavaScript string indices into the serialised
+# innerHTML, i.e. UTF-16 code units. They are stored and compared as-is, 'Utf16Offsets' maps them to Python (code point)
+# indices wherever the content itself is sliced.
+
+MAX_HIGHLIGHTS_PER_MESSAGE = 10 # same limit the frontend enforces
+
+_TAG_RE = re.compile(r"(<[^>]+>)")
+_ASTRAL_RE = re.compile("[\U00010000-\U0010FFFF]") # characters that take two UTF-16 code units (emoji, ...)
+_REFERENCE_PREFIX_RE = re.compile(r"&#?\w*") # an unterminated character reference, e.g. '&am' of '&amp;'
+
+
+class Utf16Offsets:
+    def __init__(self, content: str):
+        self.content = content
+        self._astral = [m.start() for m in _ASTRAL_RE.finditer(content)] # code point positions
+        self._astral_units = [position + k for k, position in enumerate(self._astral)] # the same, in code units
+        self.length = len(content) + len(self._astral)
+
+    def to_index(self, offset: int) -> Optional[int]:
+        # None when the offset splits a surrogate pair
+        before = bisect_left(self._astral_units, offset)
+        if before and self._astral_units[before - 1] + 1 == offset:
+            return None
+        return offset - before
+
+    def is_boundary(self, offset: int) -> bool:
+        # A highlight may only start/end between characters of text or between tags, never inside a tag or a reference
+        index = self.to_index(offset)
+        if index is None or not 0 <= index <= len(self.content):
+            return False
+        if self.content.rfind("<", 0, index) > self.content.rfind(">", 0, index):
+            return False
+        ampersand = self.content.rfind("&", 0, index)
+        return ampersand == -1 or _REFERENCE_PREFIX_RE.fullmatch(self.content, ampersand, index) is None
+
+
+class HighlightInterval(NamedTuple):
+    id: int
+    start: int
+    end: int
+    comment: Optional[str]
+
+
+class RenderSpan(NamedTuple):
+    start: int
+    end: int
+    highlight_ids: List[int]
+    comments: List[str]
+
+
+class HighlightIndex:
+    def __init__(self, highlights: Iterable[HighlightInterval] = ()):
+        self._items: List[HighlightInterval] = sorted(highlights, key=self._key)
+        self._starts = [h.start for h in self._items]
+
+    @staticmethod
+    def _key(highlight: HighlightInterval) -> Tuple[int, int, int]:
+        return highlight.start, highlight.end, highlight.id
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[db_models.Highlight]) -> "HighlightIndex":
+        return cls(HighlightInterval(h.id, h.starting_index, h.ending_index, h.comment) for h in rows)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def overlapping(self, start: int, end: int) -> List[HighlightInterval]:
+        # Every highlight with h.start < end and h.end > start, in start order
+        limit = bisect_left(self._starts, end)
+        return [h for h in self._items[:limit] if h.end > start]
+
+    def fit(self, start: int, end: int, exclude_id: Optional[int] = None) -> Optional[Tuple[int, int]]:
+        # Server-side 'adjustHighlightIndices': trim a new range around existing highlights, None if nothing is left
+        new_start, new_end = start, end
+        for highlight in self.overlapping(start, end):
+            if highlight.id == exclude_id:
+                continue
+            if highlight.start >= new_start and highlight.end <= new_end:
+                return None
+            if highlight.start <= new_start < highlight.end:
+                new_start = highlight.end
+            if highlight.start < new_end <= highlight.end:
+                new_end = highlight.start
+        if new_start >= new_end:
+            return None
+        return new_start, new_end
+
+    def spans(self, start: int, end: int) -> List[RenderSpan]:
+        # Split the highlights visible in [start, end) into disjoint spans, each listing every highlight covering it
+        visible = self.overlapping(start, end)
+        if not visible:
+            return []
+        opens: Dict[int, List[HighlightInterval]] = defaultdict(list)
+        closes: Dict[int, List[HighlightInterval]] = defaultdict(list)
+        for highlight in visible:
+            opens[max(highlight.start, start)].append(highlight)
+            closes[min(highlight.end, end)].append(highlight)
+        boundaries = sorted(opens.keys() | closes.keys())
+
+        spans: List[RenderSpan] = []
+        active: Dict[int, HighlightInterval] = {}
+        for position, next_position in zip(boundaries, boundaries[1:]):
+            for highlight in closes.get(position, ()):
+                active.pop(highlight.id, None)
+            for highlight in opens.get(position, ()):
+                active[highlight.id] = highlight
+            if active:
+                covering = sorted(active.values(), key=self._key)
+                spans.append(RenderSpan(
+                    position,
+                    next_position,
+                    [h.id for h in covering],
+                    [h.comment for h in covering if h.comment],
+                ))
+        return spans
+
+
+def render_html(content: str, spans: List[RenderSpan]) -> str:
+    # Server-side 'applyHighlightsToHtml', built in one forward pass so inserted tags never shift later offsets.
+    # A span that crosses markup is closed before each tag and reopened after it, so the output stays well-formed.
+    offsets = Utf16Offsets(content)
+    parts: List[str] = []
+    cursor = 0
+    for span in spans:
+        start, end = offsets.to_index(span.start), offsets.to_index(span.end)
+        if start is None or end is None or start < cursor or end > len(content):
+            continue
+        comment = html.escape("\n".join(span.comments), quote=True)
+        ids = " ".join(str(i) for i in span.highlight_ids)
+        open_tag = f'<span class="highlight-span" data-highlight-ids="{ids}"' + (f' data-comment="{comment}">' if comment else ">")
+        close_tag = "</span>"
+        target = _TAG_RE.sub(lambda m: f"{close_tag}{m.group(1)}{open_tag}", content[start:end])
+        parts.append(content[cursor:start])
+        parts.append(f"{open_tag}{target}{close_tag}")
+        cursor = end
+    parts.append(content[cursor:])
+    return "".join(parts)
+
+
+def load_index(db: Session, message_id: int, start: int = 0, end: Optional[int] = None) -> HighlightIndex:
+    # Only the rows that can overlap [start, end) are read, using 'ix_highlights_message_start'
+    stmt = select(db_models.Highlight).where(
+        db_models.Highlight.chatmessage_id == message_id,
+        db_models.Highlight.ending_index > start,
+    )
+    if end is not None:
+        stmt = stmt.where(db_models.Highlight.starting_index < end)
+    return HighlightIndex.from_rows(db.execute(stmt).scalars())
@@ -0,0 +1,40 @@
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Counts requests that must not be cut off by a shutdown (OpenRouter generations: the user has already been charged
+# rate-limit budget for them and the response cannot be replayed). The app lifespan waits for the count to reach zero
+# before tearing down the database and flushing buffered state.
+class InFlight:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._count = 0
+
+    @property
+    def count(self) -> int:
+        with self._lock:
+            return self._count
+
+    @contextmanager
+    def track(self):
+        with self._lock:
+            self._count += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._count -= 1
+
+    async def drain(self, timeout: float, poll_interval: float = 0.1) -> bool:
+        # True if everything finished, False if the timeout ran out first
+        deadline = time.monotonic() + timeout
+        while self.count > 0:
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(poll_interval)
+        return True
+
+
+generations_in_flight = InFlight()
@@ -0,0 +1,24 @@
+from config import Config as conf
+
+
+# smtplib and the email package are only imported when a verification email is actually sent (a background task after signup)
+
+
+def send_verification_email(to_email: str, code: str):
+    import smtplib
+    from email.message import EmailMessage
+
+    msg = EmailMessage()
+    msg["Subject"] = "LPT verification code"
+    msg["From"] = conf.SMTP_FROM        # some email services only allow you to send emails from verified addresses, which may be different from the generated address we use in 'smtp.login'
+    msg["To"] = to_email
+    msg.set_content(
+        f"Hi bro!\n\n"
+        f"Your verification code is: {code}\n\n"
+        f"It will expire in 24 hours.\n"
+    )
+
+    with smtplib.SMTP(conf.SMTP_SERVER, conf.SMTP_PORT) as server:
+        server.starttls()
+        server.login(conf.SMTP_USER, conf.SMTP_PASSWORD)
+        server.send_message(msg)
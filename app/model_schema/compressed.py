@@ -0,0 +1,74 @@
+import zlib
+
+from sqlalchemy import LargeBinary
+from sqlalchemy.types import TypeDecorator
+
+try:
+    import zstandard
+except ImportError: # optional, zlib is used when it is not installed
+    zstandard = None
+
+
+# Transparent compression for long text columns (rendered model responses)
+# Stored values are bytes prefixed with a one-byte codec header. Values under the threshold are stored as-is
+# (compressing a short prompt costs more than it saves). Rows written before this type existed are plain TEXT (SQLite)
+# or UTF-8 bytes without a header (Postgres after the column migration), and are still read correctly.
+
+RAW = b"\x00"
+ZLIB = b"\x01"
+ZSTD = b"\x02"
+
+DEFAULT_THRESHOLD = 256 # bytes
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 9
+
+
+def is_encoded(value) -> bool:
+    return isinstance(value, (bytes, bytearray, memoryview)) and bytes(value[:1]) in (RAW, ZLIB, ZSTD)
+
+
+def compress_text(value: str, threshold: int = DEFAULT_THRESHOLD) -> bytes:
+    data = value.encode("utf-8")
+    if len(data) < threshold:
+        return RAW + data
+    if zstandard is not None:
+        packed = ZSTD + zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    else:
+        packed = ZLIB + zlib.compress(data, ZLIB_LEVEL)
+    # Incompressible text (already short, or mostly unique tokens) is kept raw
+    return packed if len(packed) < len(data) + 1 else RAW + data
+
+
+def decompress_text(value) -> str:
+    if isinstance(value, str):
+        return value # legacy TEXT row
+    value = bytes(value)
+    header, payload = value[:1], value[1:]
+    if header == RAW:
+        return payload.decode("utf-8")
+    if header == ZLIB:
+        return zlib.decompress(payload).decode("utf-8")
+    if header == ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Row is zstd-compressed but the 'zstandard' package is not installed")
+        return zstandard.ZstdDecompressor().decompress(payload).decode("utf-8")
+    return value.decode("utf-8") # legacy UTF-8 bytes without a header
+
+
+class CompressedText(TypeDecorator):
+    impl = LargeBinary
+    cache_ok = True
+
+    def __init__(self, threshold: int = DEFAULT_THRESHOLD, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threshold = threshold
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_text(value, self.threshold)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decompress_text(value)
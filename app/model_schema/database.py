@@ -12,9 +12,32 @@ engine = create_engine(conf.DATABASE_URL, connect_args=connect_args, echo=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+_schema_ready = False
+
+
 def init_db():
+    # Runs once per process tree: the production launcher calls it in the master before forking (gunicorn.conf.py),
+    # workers inherit '_schema_ready' and skip it in their lifespan
+    global _schema_ready
+    if _schema_ready:
+        return
     import app.model_schema.models
+    from app.model_schema.upgrade import upgrade_schema
+    from app.search import init_search_index
+    from app.stars import reconcile_likes
     Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+    # create_all skips tables that already exist, so indexes added to an existing table are created here
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    init_search_index(engine)
+    db = SessionLocal()
+    try:
+        reconcile_likes(db) # deltas a killed worker never flushed are lost, recount from 'chat_stars' before serving
+    finally:
+        db.close()
+    _schema_ready = True
 
 def shutdown_db():
     engine.dispose()
\ No newline at end of file
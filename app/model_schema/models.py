@@ -6,6 +6,7 @@ from sqlalchemy import (
     Date,
     DateTime,
     ForeignKey,
+    Index,
     Integer,
     String,
     Text,
@@ -14,6 +15,14 @@ from sqlalchemy import (
 )
 from sqlalchemy.orm import relationship
 from app.model_schema.database import Base
+from app.model_schema.compressed import CompressedText
+
+
+PREVIEW_LENGTH = 160 # characters of the first prompt kept uncompressed on the chat, for listings and gallery cards
+
+
+def preview_text(content: str) -> str:
+    return content[:PREVIEW_LENGTH]
 
 
 class User(Base):
@@ -86,7 +95,7 @@ class Chat(Base):
     __tablename__ = "chats"
 
     id = Column(Integer, primary_key=True, index=True)
-    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     title = Column(String(255), nullable=False)
     model_id = Column(Integer, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False) # date first saved, not necessarily the same as 'published_at'
@@ -98,6 +107,8 @@ class Chat(Base):
     likes = Column(Integer, nullable=False, default=0)
     published_at = Column(DateTime(timezone=True), nullable=True)
 
+    first_prompt_preview = Column(String(PREVIEW_LENGTH), nullable=True) # written on save, so listings never load message content
+
     # RELATIONSHIPS
     owner = relationship("User", back_populates="chats")
     messages = relationship(
@@ -111,6 +122,12 @@ class Chat(Base):
         back_populates="chat",
         cascade="all, delete-orphan",
     )
+    analytics = relationship(
+        "ChatAnalytics",
+        back_populates="chat",
+        cascade="all, delete-orphan",
+        uselist=False,
+    )
 
     def __repr__(self) -> str:
         return f"<Chat id={self.id} title={self.title!r} owner_id={self.owner_id} public={self.is_public} likes={self.likes}>"
@@ -139,9 +156,9 @@ class ChatMessage(Base):
     __tablename__ = "chatmessages"
 
     id = Column(Integer, primary_key=True, index=True)
-    chat_id = Column(Integer, ForeignKey("chats.id"), nullable=False)
+    chat_id = Column(Integer, ForeignKey("chats.id"), nullable=False, index=True)
     role = Column(Integer, nullable=False) # user = 0, model = 1
-    content = Column(Text, nullable=False)
+    content = Column(CompressedText(), nullable=False) # rendered HTML, compressed above a size threshold (see compressed.py)
 
     # RELATIONSHIPS
     chat = relationship("Chat", back_populates="messages")
@@ -158,6 +175,10 @@ class ChatMessage(Base):
 
 class Highlight(Base):
     __tablename__ = "highlights"
+    __table_args__ = (
+        # Window/overlap queries for one message (see app/highlights.py)
+        Index("ix_highlights_message_start", "chatmessage_id", "starting_index"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     chatmessage_id = Column(Integer, ForeignKey("chatmessages.id"), nullable=False)
@@ -173,3 +194,19 @@ class Highlight(Base):
 
     def __repr__(self) -> str:
         return (f"<Highlight id={self.id} chatmessage_id={self.chatmessage_id} range=({self.starting_index} - {self.ending_index}) comment={self.comment}>")
+
+
+# Cached drift metrics (see app/analytics.py), one row per chat
+class ChatAnalytics(Base):
+    __tablename__ = "chat_analytics"
+
+    chat_id = Column(Integer, ForeignKey("chats.id"), primary_key=True)
+    version = Column(Integer, nullable=False) # 'ANALYTICS_VERSION' the metrics were computed with
+    metrics = Column(Text, nullable=False) # JSON list, one entry per generation
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    # RELATIONSHIPS
+    chat = relationship("Chat", back_populates="analytics")
+
+    def __repr__(self) -> str:
+        return f"<ChatAnalytics chat_id={self.chat_id} version={self.version}>"
@@ -1,7 +1,8 @@
+import re
 from datetime import date, datetime
-from typing import List, Optional
+from typing import Annotated, List, Optional
 
-from pydantic import BaseModel, ConfigDict, EmailStr, Field
+from pydantic import AfterValidator, BaseModel, ConfigDict, EmailStr, Field
 
 
 # Auth & User
@@ -59,15 +60,61 @@ class HighlightRead(BaseModel):
     comment: Optional[str] = None
 
 
+# User text is stored and rendered as-is, control characters have no business in it (NUL cuts pages short).
+# Titles are cleaned, message content is rejected instead: stripping would shift the highlight offsets into it.
+_CONTROL_RE = re.compile(r"[\x00-\x1f\x7f]")
+_CONTENT_CONTROL_RE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]") # tab, newline and carriage return are allowed
+
+
+def _strip_control_characters(value: str) -> str:
+    return _CONTROL_RE.sub("", value)
+
+
+def _reject_control_characters(value: str) -> str:
+    if _CONTENT_CONTROL_RE.search(value):
+        raise ValueError("Message content must not contain control characters")
+    return value
+
+
+ChatTitle = Annotated[str, Field(max_length=255), AfterValidator(_strip_control_characters)]
+MessageContent = Annotated[str, AfterValidator(_reject_control_characters)]
+
+
 class HighlightCreatePayload(BaseModel):
     starting_index: int
     ending_index: int
     comment: Optional[str] = None
 
 
+# Single-highlight endpoints: offsets are UTF-16 indices into 'content', the message HTML as serialised by the browser.
+# When sent, it replaces the stored HTML (markup may differ, e.g. '<br>' for '<br />', the text may not).
+class HighlightAddPayload(HighlightCreatePayload):
+    content: Optional[MessageContent] = None
+
+
+class HighlightUpdatePayload(BaseModel):
+    starting_index: Optional[int] = None
+    ending_index: Optional[int] = None
+    comment: Optional[str] = None
+    content: Optional[MessageContent] = None
+
+
+class HighlightSpanRead(BaseModel):
+    start: int
+    end: int
+    highlight_ids: List[int]
+    comments: List[str] = []
+
+
+class HighlightSpansRead(BaseModel):
+    message_id: int
+    spans: List[HighlightSpanRead] = []
+    html: Optional[str] = None # message content with highlight <span> tags applied, only when requested
+
+
 class ChatMessageCreatePayload(BaseModel):
     role: int = Field(..., ge=0, le=1, description="0=user, 1=model")
-    content: str
+    content: MessageContent
     highlights: Optional[List[HighlightCreatePayload]] = None
 
 
@@ -87,7 +134,7 @@ class ChatHistoryPayload(BaseModel):
 
 
 class ChatSaveRequest(BaseModel):
-    title: str = Field(..., max_length=255)
+    title: ChatTitle
     anonymous: bool = False
     history: ChatHistoryPayload
 
@@ -99,10 +146,14 @@ class ChatSaveResponse(BaseModel):
 
 class ChatPublishFromSavedRequest(BaseModel):
     chat_id: int
-    new_title: str = Field(..., max_length=255)
+    new_title: ChatTitle
     anonymous: bool = False
 
 
+class ChatUnpublishRequest(BaseModel):
+    chat_id: int
+
+
 class ChatRead(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     id: int
@@ -118,6 +169,86 @@ class ChatRead(BaseModel):
     messages: List[ChatMessageRead] = []
 
 
+# Saved chats listing
+
+class ChatListItem(BaseModel):
+    id: int
+    slug: str
+    title: str
+    model_id: int
+    is_public: bool
+    likes: int
+    created_at: datetime
+    published_at: Optional[datetime] = None
+    last_activity: datetime
+    message_count: int
+    first_prompt_preview: Optional[str] = None
+    owned: bool
+    starred: bool
+
+
+class ChatListResponse(BaseModel):
+    items: List[ChatListItem] = []
+    next_cursor: Optional[int] = None # pass as 'before' to get the next page
+
+
+# Stars
+
+class ChatStarResponse(BaseModel):
+    chat_id: int
+    starred: bool
+    likes: int
+
+
+class ChatStarLookupResponse(BaseModel):
+    starred: List[int] = [] # subset of the requested chat ids that the current user has starred
+
+
+# Search
+
+class ChatSearchResult(BaseModel):
+    chat_id: int
+    slug: str
+    title: str
+    published_at: Optional[datetime] = None
+    rank: float
+    snippet: str # HTML-escaped, matched terms wrapped in <mark> tags
+
+
+class ChatSearchResponse(BaseModel):
+    query: str
+    page: int
+    page_size: int
+    has_more: bool
+    results: List[ChatSearchResult] = []
+
+
+# Analytics
+
+class GenerationMetrics(BaseModel):
+    generation: int
+    message_id: int
+    words: int
+    similarity: Optional[float] = None # None for the first generation, which has nothing to compare against
+    jaccard: Optional[float] = None
+    novelty: Optional[float] = None
+    drift_from_first: float
+
+
+class ChatAnalyticsRead(BaseModel):
+    chat_id: int
+    model_id: int
+    generations: List[GenerationMetrics] = []
+
+
+class ModelDriftRead(BaseModel):
+    model_a: int
+    model_b: int
+    pairs: int
+    similarity: float
+    jaccard: float
+
+
 # OpenRouter API communication
 
 class ChatSubmitRequest(BaseModel):
@@ -0,0 +1,96 @@
+from typing import List, Tuple
+
+from sqlalchemy import inspect, select, text, update
+from sqlalchemy.engine import Engine
+
+
+# In-place upgrades for databases created by an older version, run from init_db (once, before workers start).
+# create_all only creates missing tables; columns added to existing tables are added here, then backfilled, and
+# columns whose storage type changed (CompressedText on Postgres) are converted.
+
+
+def add_missing_columns(engine: Engine) -> List[Tuple[str, str]]:
+    # Only nullable columns can be added this way, which is how new columns on existing tables are declared
+    from app.model_schema.database import Base
+
+    inspector = inspect(engine)
+    added = []
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                added.append((table.name, column.name))
+    return added
+
+
+def convert_compressed_columns(engine: Engine) -> List[Tuple[str, str]]:
+    # CompressedText binds bytes: on Postgres a column created as TEXT by an older version has to become BYTEA before
+    # the first save. Existing values become UTF-8 bytes without a codec header, which 'decompress_text' still reads;
+    # 'python -m app.compression migrate' compresses them afterwards. SQLite stores either type in any column.
+    from app.model_schema.compressed import CompressedText
+    from app.model_schema.database import Base
+
+    if engine.dialect.name != "postgresql":
+        return []
+    converted = []
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            for column in table.columns:
+                if not isinstance(column.type, CompressedText):
+                    continue
+                data_type = conn.execute(
+                    text("SELECT data_type FROM information_schema.columns WHERE table_name = :table AND column_name = :column"),
+                    {"table": table.name, "column": column.name},
+                ).scalar()
+                if data_type is not None and data_type != "bytea":
+                    conn.execute(text(
+                        f"ALTER TABLE {table.name} ALTER COLUMN {column.name} TYPE BYTEA USING convert_to({column.name}, 'UTF8')"
+                    ))
+                    converted.append((table.name, column.name))
+    return converted
+
+
+def backfill_chat_previews(engine: Engine, chunk_size: int = 500) -> int:
+    # Chats saved before 'first_prompt_preview' existed: read each first prompt once (decompressed by the ORM type)
+    from app.model_schema import models as db_models
+
+    Chat, ChatMessage = db_models.Chat, db_models.ChatMessage
+    first_prompt = (
+        select(ChatMessage.content)
+        .where(ChatMessage.chat_id == Chat.id, ChatMessage.role == 0)
+        .order_by(ChatMessage.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    filled = 0
+    last_id = 0
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                select(Chat.id, first_prompt).where(Chat.id > last_id).order_by(Chat.id).limit(chunk_size)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            for chat_id, content in rows:
+                if content:
+                    conn.execute(
+                        update(Chat.__table__)
+                        .where(Chat.__table__.c.id == chat_id)
+                        .values(first_prompt_preview=db_models.preview_text(content))
+                    )
+                    filled += 1
+    return filled
+
+
+def upgrade_schema(engine: Engine) -> None:
+    convert_compressed_columns(engine)
+    added = add_missing_columns(engine)
+    if ("chats", "first_prompt_preview") in added:
+        backfill_chat_previews(engine)
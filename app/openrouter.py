@@ -0,0 +1,48 @@
+from functools import lru_cache
+
+from app import models_list
+from config import Config as conf
+
+
+# OpenRouter calls and rendering of their responses
+# The 'openai' SDK takes longer to import than the rest of the app combined, so it is imported, and the client built,
+# by the first generation rather than by every worker (and test process) at startup. 'markdown' is deferred the same way.
+
+
+@lru_cache(maxsize=None)
+def get_client():
+    from openai import OpenAI
+
+    return OpenAI(
+      base_url="https://openrouter.ai/api/v1",
+      api_key=conf.SECRET_KEY,
+    )
+
+
+def call_openrouter(model_id: int, prompt: str):
+    model = models_list.get(model_id)["api_name"]
+
+    response = get_client().chat.completions.create(
+        model=model,
+        messages=[
+            { "role": "system", "content": "You are a helpful assistant." },
+            { "role": "user", "content": prompt }
+        ]
+    )
+
+    total_tokens = response.usage.total_tokens
+    prompt_tokens = response.usage.prompt_tokens
+    completion_tokens = response.usage.completion_tokens
+    response_text = response.choices[0].message.content
+    response_text = response_text or "" # if None
+
+    return response_text, total_tokens, prompt_tokens, completion_tokens
+
+
+def render_markdown(text: str) -> str:
+    import markdown
+
+    return markdown.markdown(
+        text,
+        extensions=['fenced_code', 'nl2br'] # 'fenced_code' handles ```code``` blocks, 'nl2br' handles \n -> <br>
+    )
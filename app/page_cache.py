@@ -0,0 +1,301 @@
+import hashlib
+import math
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from functools import lru_cache
+from typing import Dict, Hashable, List, NamedTuple, Optional, Set, Tuple
+
+from fastapi import Request, status
+from fastapi.responses import HTMLResponse, Response
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import Markup, escape
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app import models_list
+from app.model_schema import models as db_models
+from app.shared_state import gallery_version
+
+
+# Rendered page and fragment cache
+# - Templates are compiled once per process (in the launcher's master before forking, see 'precompile_templates')
+#   and never re-checked on disk: templates only change on deploy. Cached pages are keyed on the modification times of
+#   the static files they link to, so editing an asset (e.g. under 'fastapi dev') updates its '?v=' hash.
+# - Pages are rendered into shells: the per-user parts are slot() markers that 'Shell.fill' replaces with escaped
+#   values, so a logged-in request costs a string join instead of a template render.
+# - Fragments (the model picker, one gallery card per public chat) are rendered once and reused until their inputs change.
+# - '/examples' is cached per gallery page, keyed on the gallery version kept in the shared state (bumped on publish,
+#   unpublish and like flushes), and answered with ETag/Last-Modified so a revalidating browser gets a 304 without a body.
+
+TEMPLATE_DIR = "app/templates"
+STATIC_DIR = "app/static"
+GALLERY_PAGE_SIZE = 24
+CARD_PREVIEW_LENGTH = 160
+MAX_CACHED_FRAGMENTS = 2048 # gallery cards, model picker
+MAX_CACHED_PAGES = 64 # rendered '/examples' pages
+
+# Random per process (drawn before the launcher forks, so shared by its workers): shells contain user text (gallery
+# card titles and previews) that autoescape passes through, so no fixed character is safe to split on
+_SLOT_MARK = f"\x00{secrets.token_hex(16)}\x00"
+
+
+class Shell:
+    def __init__(self, rendered: str):
+        # 'rendered' alternates literal chunks and slot names: "chunk<mark>slot<mark>chunk..."
+        parts = rendered.split(_SLOT_MARK)
+        self.chunks: List[str] = parts[0::2]
+        self.slots: List[str] = parts[1::2]
+
+    def fill(self, **values) -> str:
+        # Plain strings are escaped, Markup values (pre-built HTML) are inserted as-is
+        out = [self.chunks[0]]
+        for name, chunk in zip(self.slots, self.chunks[1:]):
+            out.append(str(escape(values.get(name) or "")))
+            out.append(chunk)
+        return "".join(out)
+
+
+class RenderCache:
+    # Thread-safe LRU of rendered HTML, local to the worker process
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, object]" = OrderedDict()
+
+    def get(self, key: Hashable):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+fragments = RenderCache(MAX_CACHED_FRAGMENTS)
+pages = RenderCache(MAX_CACHED_PAGES)
+
+
+def slot(name: str) -> Markup:
+    return Markup(f"{_SLOT_MARK}{name}{_SLOT_MARK}")
+
+
+_linked_assets: Set[str] = set() # static files referenced by a rendered template, see 'static_stamp'
+
+
+def static_url(path: str) -> str:
+    # Relative (the cached HTML must not depend on the request's Host), versioned by content so browsers refetch an
+    # edited asset; the hash is cached per modification time
+    _linked_assets.add(path)
+    return f"/static/{path}?v={_static_version(path, os.stat(os.path.join(STATIC_DIR, path)).st_mtime_ns)}"
+
+
+@lru_cache(maxsize=None)
+def _static_version(path: str, mtime_ns: int) -> str:
+    with open(os.path.join(STATIC_DIR, path), "rb") as f:
+        return hashlib.blake2b(f.read(), digest_size=4).hexdigest()
+
+
+def static_stamp() -> Tuple[int, ...]:
+    # Part of every cached page key, so a page linking to an asset edited since it was rendered gets the new '?v='
+    return tuple(os.stat(os.path.join(STATIC_DIR, path)).st_mtime_ns for path in sorted(_linked_assets))
+
+
+env = Environment(
+    loader=FileSystemLoader(TEMPLATE_DIR),
+    autoescape=select_autoescape(["html"]),
+    auto_reload=False,
+    cache_size=-1,
+)
+env.globals.update(static_url=static_url, slot=slot)
+
+
+def precompile_templates() -> int:
+    # Parse and compile every template up front, plus the shells that do not depend on the database
+    names = env.list_templates(filter_func=lambda name: name.endswith(".html"))
+    for name in names:
+        env.get_template(name)
+    index_shell()
+    return len(names)
+
+
+def render(name: str, **context) -> str:
+    return env.get_template(name).render(**context)
+
+
+# -------------------- Index page --------------------
+
+
+def public_models() -> Dict[int, Dict[str, str]]:
+    # What the frontend needs from 'models_list': the id and display name, never the OpenRouter api_name
+    return {model_id: {"pretty_name": details["pretty_name"]} for model_id, details in models_list.items()}
+
+
+def model_picker() -> Markup:
+    models = public_models()
+    key = ("model_picker", tuple((model_id, details["pretty_name"]) for model_id, details in models.items()))
+    html = fragments.get(key)
+    if html is None:
+        html = Markup(render("partials/model_picker.html", models=models))
+        fragments.set(key, html)
+    return html
+
+
+def index_shell() -> Shell:
+    picker = model_picker()
+    key = ("index", picker, static_stamp())
+    shell = pages.get(key)
+    if shell is None:
+        shell = Shell(render("index.html", model_picker=picker))
+        pages.set(key, shell)
+    return shell
+
+
+def user_initials(user: db_models.User) -> str:
+    words = (user.pseudonym or user.email).split()
+    return "".join(word[0] for word in words[:2]).upper() or "?"
+
+
+def render_index(user: db_models.User) -> str:
+    return index_shell().fill(user_initials=user_initials(user), user_pseudonym=user.pseudonym)
+
+
+# -------------------- Examples page --------------------
+
+
+class GalleryCard(NamedTuple):
+    id: int
+    slug: str
+    title: str
+    model_name: str
+    author: str
+    published_at: Optional[datetime]
+    likes: int
+    message_count: int
+    preview: Optional[str]
+
+
+class CachedPage(NamedTuple):
+    shell: Shell
+    anonymous_body: bytes # the shell filled for a logged-out visitor, the common case
+    etag: str
+    last_modified: float
+
+
+def load_gallery_cards(db: Session, page: int) -> Tuple[List[GalleryCard], bool]:
+    Chat, ChatMessage = db_models.Chat, db_models.ChatMessage
+    message_count = select(func.count(ChatMessage.id)).where(ChatMessage.chat_id == Chat.id).scalar_subquery()
+    stmt = (
+        select(
+            Chat.id, Chat.slug, Chat.title, Chat.model_id, Chat.anonymous, Chat.published_at, Chat.likes,
+            db_models.User.pseudonym,
+            message_count.label("message_count"),
+            func.substr(Chat.first_prompt_preview, 1, CARD_PREVIEW_LENGTH).label("preview"),
+        )
+        .join(db_models.User, db_models.User.id == Chat.owner_id)
+        .where(Chat.is_public.is_(True))
+        .order_by(Chat.published_at.desc(), Chat.id.desc())
+        .limit(GALLERY_PAGE_SIZE + 1)
+        .offset((page - 1) * GALLERY_PAGE_SIZE)
+    )
+    rows = db.execute(stmt).mappings().all()
+    cards = [
+        GalleryCard(
+            id=row["id"],
+            slug=row["slug"],
+            title=row["title"],
+            model_name=(models_list.get(row["model_id"]) or {}).get("pretty_name", "Unknown model"),
+            author="Anonymous" if row["anonymous"] else row["pseudonym"],
+            published_at=row["published_at"],
+            likes=row["likes"],
+            message_count=row["message_count"],
+            preview=row["preview"],
+        )
+        for row in rows[:GALLERY_PAGE_SIZE]
+    ]
+    return cards, len(rows) > GALLERY_PAGE_SIZE
+
+
+def gallery_card(card: GalleryCard) -> Markup:
+    # Keyed on everything the card shows, so an edited or re-liked chat simply gets a new entry
+    html = fragments.get(("card", card))
+    if html is None:
+        html = Markup(render("partials/gallery_card.html", card=card))
+        fragments.set(("card", card), html)
+    return html
+
+
+def examples_page(db: Session, page: int) -> CachedPage:
+    key = ("examples", page, gallery_version(), static_stamp())
+    cached = pages.get(key)
+    if cached is None:
+        cards, has_more = load_gallery_cards(db, page)
+        shell = Shell(render(
+            "examples.html",
+            cards=Markup("\n").join(gallery_card(card) for card in cards),
+            page=page,
+            has_more=has_more,
+        ))
+        body = shell.fill().encode("utf-8")
+        cached = CachedPage(shell, body, etag_for(body), time.time())
+        pages.set(key, cached)
+    return cached
+
+
+def user_menu(user: Optional[db_models.User]) -> Markup:
+    if user is None:
+        return Markup("")
+    return Markup('<div class="user-menu" title="{}">{}</div>').format(user.pseudonym, user_initials(user))
+
+
+# -------------------- Conditional responses --------------------
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"'
+
+
+def http_date(timestamp: float) -> str:
+    return format_datetime(datetime.fromtimestamp(math.floor(timestamp), timezone.utc), usegmt=True)
+
+
+def not_modified(request: Request, etag: str, last_modified: float) -> bool:
+    # If-None-Match wins over If-Modified-Since when both are sent (RFC 9110 13.2.2)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            return math.floor(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def conditional_html(request: Request, body: bytes, etag: str, last_modified: float) -> Response:
+    # The page differs per login cookie, so shared caches must key on it, and browsers revalidate on every visit
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(last_modified),
+        "Cache-Control": "no-cache",
+        "Vary": "Cookie",
+    }
+    if not_modified(request, etag, last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return HTMLResponse(content=body, headers=headers)
@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+
+from app.routes import auth, chat, pages
+
+
+# Auth ('/auth/...'), template pages and the JSON API live in separate modules; shared dependencies are in 'deps.py'
+router = APIRouter()
+router.include_router(auth.router)
+router.include_router(pages.router)
+router.include_router(chat.router)
+
+__all__ = ["router"]
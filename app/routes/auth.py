@@ -0,0 +1,118 @@
+import secrets
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, BackgroundTasks, Depends, Form, HTTPException, status
+from fastapi.responses import JSONResponse
+from fastapi.security import OAuth2PasswordRequestForm
+from pydantic import EmailStr
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.mailer import send_verification_email
+from app.model_schema import models as db_models
+from app.model_schema import schema as schemas
+from app.routes.deps import get_db
+from app.security import create_access_token, hash_password, verify_password
+
+
+router = APIRouter(prefix="/auth")
+
+
+def get_user_by_email(db: Session, email: str) -> Optional[db_models.User]:
+    stmt = select(db_models.User).where(db_models.User.email == email)
+    return db.execute(stmt).scalars().first()
+
+
+def generate_verification_code(length: int = 6) -> str:
+    return f"{secrets.randbelow(10**length):0{length}d}"
+
+
+def save_verification_token(db: Session, user_id: int, expires_minutes: int = 60 * 24) -> str:
+    # This handles cases where the user missed the first email and requests a second, they will already have a record in the database, so we set it to used
+    db.query(db_models.EmailVerificationToken).filter_by(user_id=user_id, used=False).update({"used": True})
+
+    code = generate_verification_code()
+    while (
+        db.query(db_models.EmailVerificationToken)
+        .filter(db_models.EmailVerificationToken.token == code)
+        .first()
+        is not None
+    ):
+        code = generate_verification_code()
+
+    record = db_models.EmailVerificationToken(
+        user_id=user_id,
+        token=code,
+        expires_at=datetime.now() + timedelta(minutes=expires_minutes),
+        used=False,
+    )
+    db.add(record)
+    db.commit()
+    return code
+
+
+@router.post("/signup", response_model=schemas.UserRead, status_code=status.HTTP_201_CREATED)
+def signup(background_tasks: BackgroundTasks, email: EmailStr = Form(...), password: str = Form(...), pseudonym: str = Form(...), db: Session = Depends(get_db),):
+    if get_user_by_email(db, email):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
+
+    user = db_models.User(
+        email=email,
+        password_hash=hash_password(password),
+        verified=False,
+        pseudonym=pseudonym,
+    )
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+
+    code = save_verification_token(db, user_id=user.id)
+    background_tasks.add_task(send_verification_email, user.email, code)
+    return schemas.UserRead.model_validate(user)
+
+
+@router.post("/token", response_model=schemas.Token)
+def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    user = get_user_by_email(db, form_data.username)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect email")
+    if not verify_password(form_data.password, user.password_hash):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect password")
+
+    if not user.verified:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Email not verified")
+
+    access_token = create_access_token(data={"sub": str(user.id), "email": user.email})
+    response_payload = schemas.Token(access_token=access_token)
+    response = JSONResponse(content=response_payload.model_dump())
+    response.set_cookie(
+        key="access_token",
+        value=access_token,
+        httponly=True,
+        samesite="lax",
+        secure=False,
+    )
+    return response
+
+
+@router.post("/verify")
+def verify_email(code: str = Form(...), db: Session = Depends(get_db)):
+    record = (
+        db.query(db_models.EmailVerificationToken)
+        .filter(db_models.EmailVerificationToken.token == code)
+        .first()
+    )
+    if record is None or record.used:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid verification code")
+    if record.expires_at < datetime.now():
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Verification code expired")
+
+    user = db.get(db_models.User, record.user_id)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+
+    user.verified = True
+    record.used = True
+    db.commit()
+    return {"detail": "Verification successful"}
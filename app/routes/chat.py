@@ -0,0 +1,560 @@
+import re
+from datetime import date, datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import and_, case, exists, func, or_, select, union_all
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, joinedload
+
+from app import models_list # Schema example: "1 : { "api_name" : "minimax/minimax-m2:free", "pretty_name" : "Minimax M2"}"
+from app import export
+from app import highlights
+from app import search
+from app import stars
+from app.lifecycle import generations_in_flight
+from app.model_schema import models as db_models
+from app.model_schema import schema as schemas
+from app.openrouter import call_openrouter, render_markdown
+from app.routes.deps import get_current_user, get_current_user_optional, get_db
+from app.shared_state import bump_gallery_version
+from config import Config as conf
+
+
+router = APIRouter()
+
+
+def slugify(value: str) -> str:
+    cleaned = re.sub(r"[^a-zA-Z0-9-]+", "-", value.lower()).strip("-")
+    return cleaned or "chat"
+
+
+def unique_slug(db: Session, base: str) -> str:
+    slug = base
+    suffix = 1
+    while db.execute(select(db_models.Chat).where(db_models.Chat.slug == slug)).scalars().first():
+        slug = f"{base}-{suffix}"
+        suffix += 1
+    return slug
+
+
+def _get_or_create_daily_usage(db: Session, user_id: int, lock_row: bool = False) -> db_models.RateLimiting:
+    today = date.today()
+    query = db.query(db_models.RateLimiting).filter_by(user_id=user_id, date=today)
+    if lock_row:
+        query = query.with_for_update()
+
+    usage = query.first()
+    if usage is None:
+        usage = db_models.RateLimiting(user_id=user_id, date=today, tokens=0, num_messages=0)
+        db.add(usage)
+        db.flush()
+    return usage
+
+
+def check_rate_limits(db: Session, user_id: int) -> None:
+    usage = _get_or_create_daily_usage(db, user_id=user_id)
+
+    if usage.tokens > conf.DAILY_TOKEN_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Daily token limit reached.",
+        )
+    if usage.num_messages > conf.DAILY_MESSAGE_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Daily message limit reached.",
+        )
+
+
+def update_rate_limits(db: Session, user_id: int, tokens_used: int, message_increment: int = 1) -> None:
+    usage = _get_or_create_daily_usage(db, user_id=user_id, lock_row=True)
+    usage.tokens += tokens_used
+    usage.num_messages += message_increment
+    db.commit()
+
+
+# -------------------- Chat API --------------------
+
+
+@router.post("/api/v1/chat/submit", response_model=schemas.ChatSubmitResponse)
+def submit_chat(
+    payload: schemas.ChatSubmitRequest,
+    db: Session = Depends(get_db),
+    current_user: db_models.User = Depends(get_current_user),
+):
+    if models_list.get(payload.model_id) is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unknown model_id")
+
+    sources_text = "\n\n".join(payload.sources_list)
+    combined_prompt = f"{payload.prompt}\n\nSOURCES:\n{sources_text}" if sources_text else payload.prompt
+
+    # Check current token and message stats, do not update yet
+    check_rate_limits(db, user_id=current_user.id)
+
+    # Tracked so a graceful shutdown waits for the generation instead of dropping a response the user paid for
+    with generations_in_flight.track():
+        raw_response_text, total_tokens_used, prompt_tokens_used, completion_tokens_used = call_openrouter(model_id=payload.model_id, prompt=combined_prompt)
+
+    html_response_text = render_markdown(raw_response_text)
+
+    update_rate_limits(db, user_id=current_user.id, tokens_used=total_tokens_used)
+
+    return schemas.ChatSubmitResponse(
+        model_id=payload.model_id,
+        response_text=html_response_text,
+        prompt_tokens=prompt_tokens_used,
+        completion_tokens=completion_tokens_used
+    )
+
+
+@router.post("/api/v1/chats/save", response_model=schemas.ChatSaveResponse)
+def save_chat(
+    payload: schemas.ChatSaveRequest,
+    publish: bool = False,
+    db: Session = Depends(get_db),
+    current_user: db_models.User = Depends(get_current_user),
+):
+    model_info = models_list.get(payload.history.model_id)
+    if model_info is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Unknown model_id")
+
+    base_slug = slugify(payload.title)
+    slug = unique_slug(db, base_slug)
+
+    is_public = bool(publish)
+    anonymous = payload.anonymous if is_public else False
+    published_at = datetime.now() if is_public else None
+
+    first_prompt = next((message.content for message in payload.history.messages if message.role == 0), None)
+    chat = db_models.Chat(
+        owner_id=current_user.id,
+        title=payload.title,
+        model_id=payload.history.model_id,
+        slug=slug,
+        is_public=is_public,
+        anonymous=anonymous,
+        published_at=published_at,
+        first_prompt_preview=db_models.preview_text(first_prompt) if first_prompt else None,
+    )
+
+    for message in payload.history.messages:
+        db_message = db_models.ChatMessage(role=message.role, content=message.content)
+        if message.highlights:
+            for highlight in message.highlights:
+                db_message.highlights.append(
+                    db_models.Highlight(
+                        starting_index=highlight.starting_index,
+                        ending_index=highlight.ending_index,
+                        comment=highlight.comment,
+                    )
+                )
+        chat.messages.append(db_message)
+
+    db.add(chat)
+    try:
+        db.flush()
+        if is_public:
+            search.index_chat(db, chat)
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Could not save chat!")
+    if is_public:
+        bump_gallery_version()
+    db.refresh(chat)
+
+    return schemas.ChatSaveResponse(chat_id=chat.id)
+
+
+@router.put("/api/v1/chats/publish-from-saved")
+def publish_from_saved(
+    payload: schemas.ChatPublishFromSavedRequest,
+    db: Session = Depends(get_db),
+    current_user: db_models.User = Depends(get_current_user),
+):
+    chat = db.query(db_models.Chat).filter_by(id=payload.chat_id).first()
+    if chat is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found")
+    if chat.owner_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not your chat")
+
+    new_slug = unique_slug(db, slugify(payload.new_title))
+    chat.title = payload.new_title
+    chat.slug = new_slug
+    chat.is_public = True
+    chat.anonymous = payload.anonymous
+    chat.published_at = datetime.now()
+
+    search.index_chat(db, chat)
+    db.commit()
+    bump_gallery_version()
+    db.refresh(chat)
+    return {"success": True, "public_chat_id": chat.id, "slug": chat.slug}
+
+
+@router.put("/api/v1/chats/unpublish")
+def unpublish_chat(
+    payload: schemas.ChatUnpublishRequest,
+    db: Session = Depends(get_db),
+    current_user: db_models.User = Depends(get_current_user),
+):
+    chat = db.query(db_models.Chat).filter_by(id=payload.chat_id).first()
+    if chat is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found")
+    if chat.owner_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not your chat")
+
+    chat.is_public = False
+    chat.anonymous = False
+    chat.published_at = None
+
+    search.unindex_chat(db, chat.id)
+    db.commit()
+    bump_gallery_version()
+    return {"success": True, "chat_id": chat.id}
+
+
+def get_starrable_chat(db: Session, chat_id: int, user: db_models.User) -> db_models.Chat:
+    chat = db.get(db_models.Chat, chat_id)
+    if chat is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found")
+    if not chat.is_public and chat.owner_id != user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Chat is private")
+    return chat
+
+
+# Star/unstar are idempotent, 'likes' is updated asynchronously (see app/stars.py) so the returned count may lead the database
+@router.put("/api/v1/chats/{chat_id}/star", response_model=schemas.ChatStarResponse)
+def star_chat(
+    chat_id: int,
+    db: Session = Depends(get_db),
+    current_user: db_models.User = Depends(get_current_user),
+):
+    chat = get_starrable_chat(db, chat_id, current_user)
+    stars.star_chat(db, user_id=current_user.id, chat_id=chat.id)
+    return schemas.ChatStarResponse(chat_id=chat.id, starred=True, likes=stars.current_likes(chat))
+
+
+@router.delete("/api/v1/chats/{chat_id}/star", response_model=schemas.ChatStarResponse)
+def unstar_chat(
+    chat_id: int,
+    db: Session = Depends(get_db),
+    current_user: db_models.User = Depends(get_current_user),
+):
+    # No visibility check: a star left on a chat that was unpublished since must stay removable, and deleting a star
+    # the user does not have is a no-op
+    chat = db.get(db_models.Chat, chat_id)
+    if chat is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found")
+    stars.unstar_chat(db, user_id=current_user.id, chat_id=chat.id)
+    return schemas.ChatStarResponse(chat_id=chat.id, starred=False, likes=stars.current_likes(chat))
+
+
+# Which of the chats on a gallery page the current user has starred, e.g. '?chat_ids=1&chat_ids=2'
+@router.get("/api/v1/chats/stars", response_model=schemas.ChatStarLookupResponse)
+def starred_lookup(
+    chat_ids: List[int] = Query(..., max_length=100),
+    db: Session = Depends(get_db),
+    current_user: db_models.User = Depends(get_current_user),
+):
+    return schemas.ChatStarLookupResponse(starred=stars.starred_chat_ids(db, current_user.id, chat_ids))
+
+
+def get_message_for_user(db: Session, message_id: int, user: Optional[db_models.User], write: bool = False) -> db_models.ChatMessage:
+    message = db.get(db_models.ChatMessage, message_id)
+    if message is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Message not found")
+    is_owner = user is not None and message.chat.owner_id == user.id
+    if write and not is_owner:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not your chat")
+    if not message.chat.is_public and not is_owner:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Chat is private")
+    return message
+
+
+def sync_message_content(db: Session, message: db_models.ChatMessage, content: Optional[str], keep_id: Optional[int] = None) -> None:
+    # The browser's offsets refer to its own serialisation of the message, which can differ from what markdown produced
+    # ('<br>' vs '<br />'). The client sends that serialisation and it replaces the stored HTML when only markup differs.
+    # Other highlights on the message were computed against the stored HTML, so the swap is refused while any exist.
+    if content is None or content == message.content:
+        return
+    if " ".join(search.plain_text(content).split()) != " ".join(search.plain_text(message.content).split()):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Message content does not match the saved message")
+    others = db.query(db_models.Highlight).filter(
+        db_models.Highlight.chatmessage_id == message.id,
+        db_models.Highlight.id != keep_id,
+    ).count()
+    if others:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Message content does not match the saved message")
+    message.content = content
+
+
+def fit_highlight(db: Session, message: db_models.ChatMessage, start: int, end: int, exclude_id: Optional[int] = None):
+    # 'start'/'end' are UTF-16 offsets (see app/highlights.py), so they are checked against the content in code units
+    offsets = highlights.Utf16Offsets(message.content)
+    if start < 0 or end > offsets.length or start >= end:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Highlight is out of the message bounds")
+    if not offsets.is_boundary(start) or not offsets.is_boundary(end):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Highlight starts or ends inside markup")
+    fitted = highlights.load_index(db, message.id, start, end).fit(start, end, exclude_id=exclude_id)
+    if fitted is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Highlight overlaps existing highlights")
+    return fitted
+
+
+# Single-highlight edits, so the client no longer resaves the whole chat to change one annotation
+@router.post("/api/v1/messages/{message_id}/highlights", response_model=schemas.HighlightRead, status_code=status.HTTP_201_CREATED)
+def add_highlight(
+    message_id: int,
+    payload: schemas.HighlightAddPayload,
+    db: Session = Depends(get_db),
+    current_user: db_models.User = Depends(get_current_user),
+):
+    message = get_message_for_user(db, message_id, current_user, write=True)
+    count = db.query(db_models.Highlight).filter_by(chatmessage_id=message.id).count()
+    if count >= highlights.MAX_HIGHLIGHTS_PER_MESSAGE:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Maximum number of highlights reached")
+
+    sync_message_content(db, message, payload.content)
+
+    start, end = fit_highlight(db, message, payload.starting_index, payload.ending_index)
+    highlight = db_models.Highlight(chatmessage_id=message.id, starting_index=start, ending_index=end, comment=payload.comment)
+    db.add(highlight)
+    db.commit()
+    db.refresh(highlight)
+    return schemas.HighlightRead.model_validate(highlight)
+
+
+@router.patch("/api/v1/highlights/{highlight_id}", response_model=schemas.HighlightRead)
+def edit_highlight(
+    highlight_id: int,
+    payload: schemas.HighlightUpdatePayload,
+    db: Session = Depends(get_db),
+    current_user: db_models.User = Depends(get_current_user),
+):
+    highlight = db.get(db_models.Highlight, highlight_id)
+    if highlight is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Highlight not found")
+    message = get_message_for_user(db, highlight.chatmessage_id, current_user, write=True)
+
+    if payload.starting_index is not None or payload.ending_index is not None:
+        # New content is only accepted together with new offsets, the stored ones refer to the old HTML
+        sync_message_content(db, message, payload.content, keep_id=highlight.id)
+        start = payload.starting_index if payload.starting_index is not None else highlight.starting_index
+        end = payload.ending_index if payload.ending_index is not None else highlight.ending_index
+        highlight.starting_index, highlight.ending_index = fit_highlight(db, message, start, end, exclude_id=highlight.id)
+    elif payload.content is not None and payload.content != message.content:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Message content does not match the saved message")
+    if "comment" in payload.model_fields_set:
+        highlight.comment = payload.comment
+
+    db.commit()
+    db.refresh(highlight)
+    return schemas.HighlightRead.model_validate(highlight)
+
+
+@router.delete("/api/v1/highlights/{highlight_id}")
+def remove_highlight(
+    highlight_id: int,
+    db: Session = Depends(get_db),
+    current_user: db_models.User = Depends(get_current_user),
+):
+    highlight = db.get(db_models.Highlight, highlight_id)
+    if highlight is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Highlight not found")
+    get_message_for_user(db, highlight.chatmessage_id, current_user, write=True)
+
+    db.delete(highlight)
+    db.commit()
+    return {"success": True, "highlight_id": highlight_id}
+
+
+# Pre-merged, non-overlapping render spans for the visible [start, end) window of a message
+@router.get("/api/v1/messages/{message_id}/highlights/spans", response_model=schemas.HighlightSpansRead)
+def highlight_spans(
+    message_id: int,
+    start: int = Query(0, ge=0),
+    end: Optional[int] = Query(None, ge=0),
+    render: bool = False,
+    db: Session = Depends(get_db),
+    current_user: Optional[db_models.User] = Depends(get_current_user_optional),
+):
+    message = get_message_for_user(db, message_id, current_user)
+    length = highlights.Utf16Offsets(message.content).length # the window is in UTF-16 code units, like the offsets
+    window_end = length if end is None else min(end, length)
+    spans = highlights.load_index(db, message.id, start, window_end).spans(start, window_end)
+
+    # Rendering only makes sense for the whole message, a window could cut through markup
+    rendered = highlights.render_html(message.content, spans) if render and start == 0 and window_end == length else None
+    return schemas.HighlightSpansRead(
+        message_id=message.id,
+        spans=[schemas.HighlightSpanRead(**span._asdict()) for span in spans],
+        html=rendered,
+    )
+
+
+# Ranked full-text search over published chats, matched terms are highlighted in the returned snippet
+@router.get("/api/v1/chats/search", response_model=schemas.ChatSearchResponse)
+def search_chats(
+    q: str = Query(..., min_length=1, max_length=200),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=50),
+    db: Session = Depends(get_db),
+):
+    # Fetch one extra row to know whether there is a next page without a separate COUNT(*)
+    rows = search.search_chats(db, q, limit=page_size + 1, offset=(page - 1) * page_size)
+    return schemas.ChatSearchResponse(
+        query=q,
+        page=page,
+        page_size=page_size,
+        has_more=len(rows) > page_size,
+        results=[schemas.ChatSearchResult(**row) for row in rows[:page_size]],
+    )
+
+
+PREVIEW_LENGTH = 120
+
+
+# "My chats" listing: owned chats + public chats the user starred, newest first, keyset-paginated on chats.id.
+# Each scope is an id-descending, keyset-limited walk of one index ('ix_chats_owner_id' for owned chats,
+# 'uq_chat_star_user_chat' for stars), so the cost follows the user's own chats and stars, never the whole gallery.
+# Message count, last activity and the first prompt preview are computed in SQL, message contents are never loaded.
+@router.get("/api/v1/chats/saved", response_model=schemas.ChatListResponse)
+def list_saved_chats(
+    scope: str = Query("all", pattern="^(all|owned|starred)$"),
+    before: Optional[int] = Query(None, ge=1),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db),
+    current_user: db_models.User = Depends(get_current_user),
+):
+    Chat, ChatMessage, ChatStar = db_models.Chat, db_models.ChatMessage, db_models.ChatStar
+
+    owned_ids = select(Chat.id.label("id")).where(Chat.owner_id == current_user.id)
+    # An unpublished chat drops out of other users' stars
+    starred_ids = (
+        select(ChatStar.chat_id.label("id"))
+        .join(Chat, Chat.id == ChatStar.chat_id)
+        .where(ChatStar.user_id == current_user.id, or_(Chat.is_public.is_(True), Chat.owner_id == current_user.id))
+    )
+    if before is not None:
+        owned_ids = owned_ids.where(Chat.id < before)
+        starred_ids = starred_ids.where(ChatStar.chat_id < before)
+    owned_ids = owned_ids.order_by(Chat.id.desc())
+    starred_ids = starred_ids.order_by(ChatStar.chat_id.desc())
+
+    if scope == "owned":
+        branches = [owned_ids]
+    elif scope == "starred":
+        branches = [starred_ids]
+    else:
+        branches = [owned_ids, starred_ids.where(Chat.owner_id != current_user.id)] # owned chats come from the first branch
+    # Every branch is limited on its own, then merged; ORDER BY/LIMIT inside a compound member needs a subquery
+    limited = [select(branch.limit(limit + 1).subquery().c.id) for branch in branches]
+    ids = (limited[0] if len(limited) == 1 else union_all(*limited)).subquery()
+    page_ids = select(ids.c.id).order_by(ids.c.id.desc()).limit(limit + 1).subquery()
+
+    message_count = (
+        select(func.count(ChatMessage.id)).where(ChatMessage.chat_id == Chat.id).scalar_subquery()
+    )
+    last_activity = case(
+        (and_(Chat.published_at.is_not(None), Chat.published_at > Chat.created_at), Chat.published_at),
+        else_=Chat.created_at,
+    )
+    is_starred = exists().where(ChatStar.user_id == current_user.id, ChatStar.chat_id == Chat.id)
+
+    stmt = (
+        select(
+            Chat.id, Chat.slug, Chat.title, Chat.model_id, Chat.is_public, Chat.likes, Chat.created_at, Chat.published_at,
+            last_activity.label("last_activity"),
+            message_count.label("message_count"),
+            func.substr(Chat.first_prompt_preview, 1, PREVIEW_LENGTH).label("first_prompt_preview"),
+            (Chat.owner_id == current_user.id).label("owned"),
+            is_starred.label("starred"),
+        )
+        .join(page_ids, page_ids.c.id == Chat.id)
+        .order_by(Chat.id.desc())
+    )
+
+    rows = db.execute(stmt).mappings().all()
+    items = [schemas.ChatListItem(**row) for row in rows[:limit]]
+    next_cursor = items[-1].id if len(rows) > limit else None
+    return schemas.ChatListResponse(items=items, next_cursor=next_cursor)
+
+
+@router.get("/api/v1/chats/saved/{slug}", response_model=schemas.ChatRead)
+def get_saved_chat(
+    slug: str,
+    db: Session = Depends(get_db),
+    current_user: Optional[db_models.User] = Depends(get_current_user_optional),
+):
+    stmt = (
+        select(db_models.Chat)
+        .where(db_models.Chat.slug == slug)
+        .options(
+            joinedload(db_models.Chat.messages).joinedload(db_models.ChatMessage.highlights)
+        )
+    )
+    chat = db.execute(stmt).scalars().first()
+    if chat is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found")
+
+    if not chat.is_public and (current_user is None or chat.owner_id != current_user.id):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Chat is private")
+
+    return schemas.ChatRead.model_validate(chat)
+
+
+# Streams every chat the user can read (their own + public) as NDJSON, followed by the user's own daily usage rows
+@router.get("/api/v1/export")
+def export_chats(
+    model_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    visibility: str = Query("all", pattern="^(all|public|private)$"),
+    include_usage: bool = True,
+    current_user: db_models.User = Depends(get_current_user),
+):
+    lines = export.iter_ndjson(
+        owner_id=current_user.id,
+        model_id=model_id,
+        since=since,
+        until=until,
+        visibility=visibility,
+        include_usage=include_usage,
+    )
+    return StreamingResponse(
+        lines,
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="llm-philosophy-trials.ndjson"'},
+    )
+
+
+# -------------------- Analytics API --------------------
+
+
+@router.get("/api/v1/analytics/chats/{slug}", response_model=schemas.ChatAnalyticsRead)
+def chat_analytics(
+    slug: str,
+    db: Session = Depends(get_db),
+    current_user: Optional[db_models.User] = Depends(get_current_user_optional),
+):
+    chat = db.execute(select(db_models.Chat).where(db_models.Chat.slug == slug)).scalars().first()
+    if chat is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Chat not found")
+    if not chat.is_public and (current_user is None or chat.owner_id != current_user.id):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Chat is private")
+
+    from app import analytics # NumPy is only loaded once analytics are requested
+
+    metrics = analytics.get_chat_analytics(db, [chat.id])[chat.id]
+    return schemas.ChatAnalyticsRead(chat_id=chat.id, model_id=chat.model_id, generations=metrics)
+
+
+# Average similarity between different models' first responses to the same first prompt, over all public chats
+@router.get("/api/v1/analytics/models", response_model=List[schemas.ModelDriftRead])
+def model_analytics(db: Session = Depends(get_db)):
+    from app import analytics
+
+    return analytics.public_model_comparison(db)
@@ -0,0 +1,64 @@
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy.orm import Session
+
+from app.model_schema import models as db_models
+from app.model_schema.database import SessionLocal
+from app.security import decode_access_token
+
+
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token", auto_error=False)
+
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# Equivalent purpose as 'login_required' decorator from Flask
+def get_current_user(
+    request: Request,
+    db: Session = Depends(get_db),
+    token: Optional[str] = Depends(oauth2_scheme),
+) -> db_models.User:
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    if token is None:
+        token = request.cookies.get("access_token")
+    if not token:
+        raise credentials_exception
+    payload = decode_access_token(token)
+    if payload is None:
+        raise credentials_exception
+    user_id: str = payload.get("sub")
+    email: str = payload.get("email")
+    if user_id is None or email is None:
+        raise credentials_exception
+
+    user = db.get(db_models.User, int(user_id))
+    if user is None:
+        raise credentials_exception
+    return user
+
+# Optional version used for page rendering, so that the user can be redirected rather than errored
+def get_current_user_optional(
+    request: Request,
+    token: Optional[str] = Depends(oauth2_scheme),
+    db: Session = Depends(get_db),
+) -> Optional[db_models.User]:
+    if token is None:
+        token = request.cookies.get("access_token")
+    if not token:
+        return None
+    payload = decode_access_token(token)
+    if payload is None:
+        return None
+    return db.get(db_models.User, int(payload.get("sub")))
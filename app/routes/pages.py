@@ -0,0 +1,48 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi.responses import HTMLResponse, RedirectResponse
+from sqlalchemy.orm import Session
+
+from app import page_cache
+from app.model_schema import models as db_models
+from app.routes.deps import get_current_user, get_current_user_optional, get_db
+
+
+router = APIRouter()
+
+
+# Templates are rendered through 'app/page_cache.py': cached shells with the per-user values filled in per request
+@router.get("/", response_class=HTMLResponse)
+async def home(
+    request: Request,
+    current_user: Optional[db_models.User] = Depends(get_current_user_optional),
+):
+    if current_user is None:
+        return RedirectResponse(url="/examples", status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+    return HTMLResponse(page_cache.render_index(current_user)) # the model picker only carries each model's id and pretty_name, never its api_name
+
+
+# Every Chat with 'is_public' set to true, newest first, as cached cards; revalidated with ETag/Last-Modified
+@router.get("/examples", response_class=HTMLResponse)
+def examples(
+    request: Request,
+    page: int = Query(1, ge=1),
+    db: Session = Depends(get_db),
+    current_user: Optional[db_models.User] = Depends(get_current_user_optional),
+):
+    cached = page_cache.examples_page(db, page)
+    if current_user is None:
+        return page_cache.conditional_html(request, cached.anonymous_body, cached.etag, cached.last_modified)
+    body = cached.shell.fill(user_menu=page_cache.user_menu(current_user)).encode("utf-8")
+    return page_cache.conditional_html(request, body, page_cache.etag_for(body), cached.last_modified)
+
+
+@router.get("/saved-chats", response_class=HTMLResponse)
+async def saved_chats(
+    request: Request,
+    current_user: db_models.User = Depends(get_current_user),
+):
+    if current_user is None:
+        return RedirectResponse(url="/examples", status_code=status.HTTP_307_TEMPORARY_REDIRECT)
+    return HTMLResponse(page_cache.render("saved.html", user=current_user, saved_view=True))
@@ -0,0 +1,189 @@
+import html
+import re
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.model_schema import models as db_models
+
+
+# Full-text index over published chats (title + every message), one row per chat keyed by the chat id.
+# SQLite uses an FTS5 virtual table, Postgres uses a plain table with a generated tsvector column + GIN index.
+# The index is only written from the save/publish/unpublish routes, so a query never touches 'chatmessages'.
+
+# Snippet markers, swapped for <mark> tags after the snippet is escaped so message text can never inject HTML.
+# Both are removed from the indexed title and body, so only the ones the database inserts reach '_render_snippet'.
+_MARK_START = "\x02"
+_MARK_END = "\x03"
+_MARKS_RE = re.compile(f"[{_MARK_START}{_MARK_END}]")
+
+_SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS chat_search USING fts5(title, body, tokenize = 'porter unicode61')",
+]
+
+_POSTGRES_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS chat_search (
+        chat_id INTEGER PRIMARY KEY REFERENCES chats(id) ON DELETE CASCADE,
+        title TEXT NOT NULL,
+        body TEXT NOT NULL,
+        document tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', title), 'A') || setweight(to_tsvector('english', body), 'B')
+        ) STORED
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_chat_search_document ON chat_search USING GIN (document)",
+]
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+SNIPPET_WORDS = 24
+TITLE_WEIGHT = 10.0  # bm25 column weight, a hit in the title outranks the same hit deep in a transcript
+
+
+def _dialect(bind) -> str:
+    return bind.dialect.name
+
+
+def init_search_index(engine: Engine) -> None:
+    ddl = _POSTGRES_DDL if _dialect(engine) == "postgresql" else _SQLITE_DDL
+    with engine.begin() as conn:
+        for statement in ddl:
+            conn.execute(text(statement))
+
+        # Backfill once for databases that already had published chats before the index existed
+        indexed = conn.execute(text("SELECT count(*) FROM chat_search")).scalar()
+        if indexed == 0:
+            with Session(bind=conn) as db:
+                rebuild_search_index(db)
+                db.flush()
+
+
+def plain_text(content: str) -> str:
+    # Model responses are stored as rendered HTML, only the visible text is worth indexing
+    return html.unescape(_TAG_RE.sub(" ", content))
+
+
+def _document(chat: db_models.Chat) -> Tuple[str, str]:
+    body = "\n".join(plain_text(message.content) for message in chat.messages)
+    return _MARKS_RE.sub("", chat.title), _MARKS_RE.sub("", body)
+
+
+def index_chat(db: Session, chat: db_models.Chat) -> None:
+    # Caller owns the transaction, so the index row is committed (or rolled back) together with the chat
+    if not chat.is_public:
+        unindex_chat(db, chat.id)
+        return
+
+    title, body = _document(chat)
+    if _dialect(db.get_bind()) == "postgresql":
+        db.execute(
+            text(
+                "INSERT INTO chat_search (chat_id, title, body) VALUES (:chat_id, :title, :body) "
+                "ON CONFLICT (chat_id) DO UPDATE SET title = excluded.title, body = excluded.body"
+            ),
+            {"chat_id": chat.id, "title": title, "body": body},
+        )
+    else:
+        # FTS5 has no upsert, replace the row by rowid instead
+        db.execute(text("DELETE FROM chat_search WHERE rowid = :chat_id"), {"chat_id": chat.id})
+        db.execute(
+            text("INSERT INTO chat_search (rowid, title, body) VALUES (:chat_id, :title, :body)"),
+            {"chat_id": chat.id, "title": title, "body": body},
+        )
+
+
+def unindex_chat(db: Session, chat_id: int) -> None:
+    column = "chat_id" if _dialect(db.get_bind()) == "postgresql" else "rowid"
+    db.execute(text(f"DELETE FROM chat_search WHERE {column} = :chat_id"), {"chat_id": chat_id})
+
+
+def rebuild_search_index(db: Session) -> int:
+    db.execute(text("DELETE FROM chat_search"))
+    chats = db.query(db_models.Chat).filter(db_models.Chat.is_public.is_(True)).yield_per(200)
+    count = 0
+    for chat in chats:
+        index_chat(db, chat)
+        count += 1
+    return count
+
+
+def _fts5_query(query: str) -> str:
+    # Quote every term so user input can never be parsed as FTS5 syntax (NEAR, column filters, stray quotes),
+    # the last term is a prefix match so "utilit" still finds "utilitarian"
+    terms = _TERM_RE.findall(query)
+    if not terms:
+        return ""
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _render_snippet(raw: str) -> str:
+    escaped = html.escape(raw or "")
+    return escaped.replace(_MARK_START, "<mark>").replace(_MARK_END, "</mark>")
+
+
+def search_chats(db: Session, query: str, limit: int, offset: int) -> List[dict]:
+    if _dialect(db.get_bind()) == "postgresql":
+        # ts_headline re-parses the body, so it only runs over the already paginated page of hits
+        stmt = text(
+            f"""
+            SELECT hits.chat_id, c.slug, c.title, c.published_at, hits.rank,
+                   ts_headline('english', s.body, websearch_to_tsquery('english', :query),
+                               'StartSel={_MARK_START}, StopSel={_MARK_END}, MaxWords={SNIPPET_WORDS}, MinWords=8, MaxFragments=1') AS snippet
+            FROM (
+                SELECT chat_id, ts_rank_cd(document, websearch_to_tsquery('english', :query)) AS rank
+                FROM chat_search
+                WHERE document @@ websearch_to_tsquery('english', :query)
+                ORDER BY rank DESC, chat_id DESC
+                LIMIT :limit OFFSET :offset
+            ) AS hits
+            JOIN chat_search s ON s.chat_id = hits.chat_id
+            JOIN chats c ON c.id = hits.chat_id AND c.is_public
+            ORDER BY hits.rank DESC, hits.chat_id DESC
+            """
+        )
+        params = {"query": query, "limit": limit, "offset": offset}
+    else:
+        match = _fts5_query(query)
+        if not match:
+            return []
+        # bm25() is "lower is better", negate it so both profiles report "higher is better".
+        # snippet() column -1 lets FTS5 pick the column with the most matches, so title-only hits are marked too
+        stmt = text(
+            f"""
+            SELECT chat_search.rowid AS chat_id, c.slug, c.title, c.published_at,
+                   -bm25(chat_search, {TITLE_WEIGHT}, 1.0) AS rank,
+                   snippet(chat_search, -1, :mark_start, :mark_end, '…', {SNIPPET_WORDS}) AS snippet
+            FROM chat_search
+            JOIN chats c ON c.id = chat_search.rowid AND c.is_public
+            WHERE chat_search MATCH :match
+            ORDER BY bm25(chat_search, {TITLE_WEIGHT}, 1.0), chat_search.rowid DESC
+            LIMIT :limit OFFSET :offset
+            """
+        )
+        params = {"match": match, "mark_start": _MARK_START, "mark_end": _MARK_END, "limit": limit, "offset": offset}
+
+    try:
+        rows = db.execute(stmt, params).mappings().all()
+    except OperationalError:
+        # Malformed queries are treated as "no results" rather than a 500
+        db.rollback()
+        return []
+
+    return [
+        {
+            "chat_id": row["chat_id"],
+            "slug": row["slug"],
+            "title": row["title"],
+            "published_at": row["published_at"],
+            "rank": float(row["rank"]),
+            "snippet": _render_snippet(row["snippet"]),
+        }
+        for row in rows
+    ]
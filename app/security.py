@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Optional
+
+from config import Config as conf
+
+
+# Password hashing and access tokens
+# passlib/bcrypt and python-jose are imported on first use instead of at startup: a worker that only serves pages and
+# public API reads never loads passlib, and jose is loaded by the first authenticated request.
+
+
+@lru_cache(maxsize=None)
+def _pwd_context():
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def hash_password(password: str) -> str:
+    return _pwd_context().hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return _pwd_context().verify(plain_password, hashed_password)
+
+
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+    from jose import jwt
+
+    payload = data.copy()
+    expire = datetime.now() + (expires_delta or timedelta(minutes=conf.ACCESS_TOKEN_EXPIRE_MINUTES))
+    payload.update({"exp": expire})
+    return jwt.encode(payload, conf.JWT_SECRET, algorithm=conf.JWT_ALGORITHM)
+
+
+def decode_access_token(token: str) -> Optional[dict]:
+    # None for a malformed, tampered or expired token
+    from jose import JWTError, jwt
+
+    try:
+        return jwt.decode(token, conf.JWT_SECRET, algorithms=[conf.JWT_ALGORITHM])
+    except JWTError:
+        return None
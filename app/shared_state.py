@@ -0,0 +1,215 @@
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+from config import Config as conf
+
+
+# Small key/value store shared by every worker process: counters (buffered likes) and caches (analytics)
+# Backends, picked from SHARED_STATE_URL:
+#   memory://               one process only, the local stand-in for development and the test client
+#   sqlite:///path/file.db  a separate WAL-mode SQLite file, shared by all workers on one machine
+#   redis://host:6379/0     Redis, when several machines serve the app (needs the 'redis' package)
+# Values are strings, counters are integers. Every method is safe to call from several threads.
+
+
+class SharedState(ABC):
+    @abstractmethod
+    def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def incr(self, key: str, amount: int = 1) -> int:
+        ...
+
+    @abstractmethod
+    def take(self, key: str) -> int:
+        # Atomically read a counter and remove it, so two workers flushing at once never apply the same delta twice
+        ...
+
+    @abstractmethod
+    def keys(self, prefix: str) -> List[str]:
+        ...
+
+
+class MemoryState(SharedState):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: Dict[str, object] = {}
+        self._expires: Dict[str, float] = {}
+
+    def _alive(self, key: str) -> bool:
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.time():
+            self._values.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._values
+
+    def get(self, key):
+        with self._lock:
+            return str(self._values[key]) if self._alive(key) else None
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._values[key] = value
+            if ttl is None:
+                self._expires.pop(key, None)
+            else:
+                self._expires[key] = time.time() + ttl
+
+    def delete(self, key):
+        with self._lock:
+            self._values.pop(key, None)
+            self._expires.pop(key, None)
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            value = int(self._values[key]) + amount if self._alive(key) else amount
+            self._values[key] = value
+            return value
+
+    def take(self, key):
+        with self._lock:
+            value = self._values.pop(key, 0) if self._alive(key) else 0
+            self._expires.pop(key, None)
+            return int(value)
+
+    def keys(self, prefix):
+        with self._lock:
+            return [key for key in list(self._values) if key.startswith(prefix) and self._alive(key)]
+
+
+class SQLiteState(SharedState):
+    PURGE_EVERY = 500 # writes between sweeps of expired rows
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        self._conn().execute(
+            "CREATE TABLE IF NOT EXISTS shared_state (key TEXT PRIMARY KEY, value, expires_at REAL)"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        # One connection per thread (and per process: a forked worker must not reuse its parent's connection)
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _purge(self) -> None:
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            self._conn().execute("DELETE FROM shared_state WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+
+    def get(self, key):
+        row = self._conn().execute(
+            "SELECT value FROM shared_state WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, time.time())
+        ).fetchone()
+        return None if row is None else str(row[0])
+
+    def set(self, key, value, ttl=None):
+        expires_at = None if ttl is None else time.time() + ttl
+        self._conn().execute(
+            "INSERT INTO shared_state (key, value, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+            (key, value, expires_at),
+        )
+        self._purge()
+
+    def delete(self, key):
+        self._conn().execute("DELETE FROM shared_state WHERE key = ?", (key,))
+
+    def incr(self, key, amount=1):
+        row = self._conn().execute(
+            "INSERT INTO shared_state (key, value, expires_at) VALUES (?, ?, NULL) "
+            "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + excluded.value RETURNING value",
+            (key, amount),
+        ).fetchone()
+        return int(row[0])
+
+    def take(self, key):
+        row = self._conn().execute("DELETE FROM shared_state WHERE key = ? RETURNING value", (key,)).fetchone()
+        return 0 if row is None else int(row[0])
+
+    def keys(self, prefix):
+        # Prefixes are internal constants, so escaping LIKE wildcards is not needed
+        rows = self._conn().execute("SELECT key FROM shared_state WHERE key LIKE ?", (prefix + "%",)).fetchall()
+        return [row[0] for row in rows]
+
+
+class RedisState(SharedState):
+    def __init__(self, url: str):
+        import redis
+        self._redis = redis.Redis.from_url(url, decode_responses=True)
+
+    def get(self, key):
+        return self._redis.get(key)
+
+    def set(self, key, value, ttl=None):
+        self._redis.set(key, value, px=None if ttl is None else int(ttl * 1000))
+
+    def delete(self, key):
+        self._redis.delete(key)
+
+    def incr(self, key, amount=1):
+        return self._redis.incrby(key, amount)
+
+    def take(self, key):
+        value = self._redis.getdel(key)
+        return 0 if value is None else int(value)
+
+    def keys(self, prefix):
+        return list(self._redis.scan_iter(match=prefix + "*"))
+
+
+def create_shared_state(url: str) -> SharedState:
+    if url.startswith("memory://"):
+        return MemoryState()
+    if url.startswith("sqlite:///"):
+        return SQLiteState(url[len("sqlite:///"):])
+    if url.startswith(("redis://", "rediss://")):
+        return RedisState(url)
+    raise ValueError(f"Unsupported SHARED_STATE_URL: {url!r}")
+
+
+_shared_state: Optional[SharedState] = None
+_shared_state_lock = threading.Lock()
+
+
+def get_shared_state() -> SharedState:
+    # Created on first use. The launcher's master may create it (init_db) before forking, every backend reconnects
+    # in a forked worker (SQLiteState per pid, redis-py's pool checks the pid itself)
+    global _shared_state
+    if _shared_state is None:
+        with _shared_state_lock:
+            if _shared_state is None:
+                _shared_state = create_shared_state(conf.SHARED_STATE_URL)
+    return _shared_state
+
+
+# Bumped after every commit that changes what the '/examples' gallery shows (publish, unpublish, flushed likes),
+# so cached gallery pages in every worker are keyed on one cheap read instead of an aggregate over the public chats
+GALLERY_VERSION_KEY = "gallery:version"
+
+
+def gallery_version() -> int:
+    return int(get_shared_state().get(GALLERY_VERSION_KEY) or 0)
+
+
+def bump_gallery_version() -> None:
+    get_shared_state().incr(GALLERY_VERSION_KEY)
@@ -0,0 +1,184 @@
+import argparse
+import asyncio
+import logging
+from typing import Dict, Iterable, List
+
+from sqlalchemy import bindparam, case, delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.model_schema import models as db_models
+from app.model_schema.database import SessionLocal
+from app.shared_state import bump_gallery_version, get_shared_state
+
+
+logger = logging.getLogger(__name__)
+
+chats_table = db_models.Chat.__table__
+
+
+# Write-behind aggregation for 'Chat.likes'
+# Star/unstar only touch 'chat_stars' (one row per user, no contention), the +1/-1 for the counter is buffered
+# in the shared state (see app/shared_state.py) and folded into a single UPDATE per chat on every flush. A popular chat
+# therefore costs one write to 'chats' per flush interval instead of one per click, which keeps SQLite's single writer
+# lock short. Every worker runs a flusher, 'take' hands each buffered delta to exactly one of them.
+# 'chat_stars' stays the source of truth: deltas still buffered when a worker is killed are lost, so 'reconcile_likes'
+# rebuilds every counter from it once per boot (from init_db), and 'python -m app.stars recount' does the same on demand.
+class LikeBuffer:
+    PREFIX = "likes:"
+
+    def __init__(self, state_factory=get_shared_state):
+        self._state_factory = state_factory
+
+    def _key(self, chat_id: int) -> str:
+        return f"{self.PREFIX}{chat_id}"
+
+    def add(self, chat_id: int, delta: int) -> None:
+        self._state_factory().incr(self._key(chat_id), delta)
+
+    def pending(self, chat_id: int) -> int:
+        return int(self._state_factory().get(self._key(chat_id)) or 0)
+
+    def drain(self) -> Dict[int, int]:
+        state = self._state_factory()
+        deltas = {}
+        for key in state.keys(self.PREFIX):
+            delta = state.take(key)
+            if delta != 0:
+                deltas[int(key[len(self.PREFIX):])] = delta
+        return deltas
+
+    def restore(self, deltas: Dict[int, int]) -> None:
+        # Used when a flush fails, so the deltas are retried on the next tick rather than lost
+        for chat_id, delta in deltas.items():
+            self.add(chat_id, delta)
+
+
+like_buffer = LikeBuffer()
+
+
+def star_chat(db: Session, user_id: int, chat_id: int) -> bool:
+    # Returns True only when a new star was recorded, a repeat star hits 'uq_chat_star_user_chat' and is a no-op
+    db.add(db_models.ChatStar(user_id=user_id, chat_id=chat_id))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return False
+    like_buffer.add(chat_id, 1)
+    return True
+
+
+def unstar_chat(db: Session, user_id: int, chat_id: int) -> bool:
+    result = db.execute(
+        delete(db_models.ChatStar).where(
+            db_models.ChatStar.user_id == user_id,
+            db_models.ChatStar.chat_id == chat_id,
+        )
+    )
+    db.commit()
+    if result.rowcount == 0:
+        return False
+    like_buffer.add(chat_id, -1)
+    return True
+
+
+def starred_chat_ids(db: Session, user_id: int, chat_ids: Iterable[int]) -> List[int]:
+    # One index lookup on (user_id, chat_id) for a whole gallery page
+    chat_ids = set(chat_ids)
+    if not chat_ids:
+        return []
+    stmt = select(db_models.ChatStar.chat_id).where(
+        db_models.ChatStar.user_id == user_id,
+        db_models.ChatStar.chat_id.in_(chat_ids),
+    )
+    return sorted(db.execute(stmt).scalars().all())
+
+
+def current_likes(chat: db_models.Chat) -> int:
+    # Persisted count plus whatever has not been flushed yet
+    return max(chat.likes + like_buffer.pending(chat.id), 0)
+
+
+def flush_likes(db: Session, buffer: LikeBuffer = like_buffer) -> int:
+    deltas = buffer.drain()
+    if not deltas:
+        return 0
+
+    new_likes = chats_table.c.likes + bindparam("delta")
+    stmt = (
+        update(chats_table)
+        .where(chats_table.c.id == bindparam("chat_id"))
+        .values(likes=case((new_likes < 0, 0), else_=new_likes))
+    )
+    # Sorted so concurrent flushers from other workers always lock rows in the same order
+    params = [{"chat_id": chat_id, "delta": delta} for chat_id, delta in sorted(deltas.items())]
+    try:
+        db.execute(stmt, params)
+        db.commit()
+    except Exception:
+        db.rollback()
+        buffer.restore(deltas)
+        raise
+    bump_gallery_version()
+    return len(params)
+
+
+def recount_likes(db: Session) -> int:
+    star_count = (
+        select(func.count(db_models.ChatStar.id))
+        .where(db_models.ChatStar.chat_id == chats_table.c.id)
+        .scalar_subquery()
+    )
+    result = db.execute(update(chats_table).where(chats_table.c.likes != star_count).values(likes=star_count))
+    db.commit()
+    bump_gallery_version()
+    return result.rowcount
+
+
+def reconcile_likes(db: Session, buffer: LikeBuffer = like_buffer) -> int:
+    # Only safe while no flusher is running (boot, or with the app stopped): buffered deltas are discarded because
+    # every star/unstar they stand for is already committed in 'chat_stars'
+    buffer.drain()
+    return recount_likes(db)
+
+
+def _flush_once() -> None:
+    db = SessionLocal()
+    try:
+        flush_likes(db)
+    finally:
+        db.close()
+
+
+async def run_like_flusher(interval: float) -> None:
+    # Started from the app lifespan, cancelled (after one last flush) on shutdown
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(_flush_once)
+            except Exception:
+                logger.exception("Flushing buffered likes failed, retrying next interval")
+    finally:
+        await asyncio.to_thread(_flush_once)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Like counter maintenance.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("recount", help="Rebuild 'chats.likes' from 'chat_stars' (run with the app stopped)")
+    parser.parse_args(argv)
+
+    from app.model_schema.database import engine
+    engine.echo = False
+    db = SessionLocal()
+    try:
+        print(f"Corrected the like count of {reconcile_likes(db)} chats")
+    finally:
+        db.close()
+
+
+# python -m app.stars recount
+if __name__ == "__main__":
+    main()
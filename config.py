@@ -3,17 +3,22 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# Only values with no sensible default are left as None (API key, JWT secret, SMTP credentials), so the app and its
+# tooling can be imported without a complete '.env'; the features that need them fail when first used instead.
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY")
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./llm_philosophy_trials.db")
     JWT_SECRET = os.getenv("JWT_SECRET")
     JWT_ALGORITHM = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES"))
-    DAILY_TOKEN_LIMIT = int(os.getenv("DAILY_TOKEN_LIMIT"))
-    DAILY_MESSAGE_LIMIT = int(os.getenv("DAILY_MESSAGE_LIMIT"))
+    ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 60 * 24))
+    DAILY_TOKEN_LIMIT = int(os.getenv("DAILY_TOKEN_LIMIT", 50000))
+    DAILY_MESSAGE_LIMIT = int(os.getenv("DAILY_MESSAGE_LIMIT", 100))
+    LIKES_FLUSH_SECONDS = float(os.getenv("LIKES_FLUSH_SECONDS", 5)) # how often buffered star/unstar deltas are written to 'chats.likes'
+    SHARED_STATE_URL = os.getenv("SHARED_STATE_URL", "memory://") # 'memory://' (single process), 'sqlite:///path', 'redis://...'
+    GENERATION_DRAIN_SECONDS = float(os.getenv("GENERATION_DRAIN_SECONDS", 120)) # how long shutdown waits for in-flight OpenRouter calls
 
     SMTP_FROM: str = os.getenv("SMTP_FROM")
     SMTP_SERVER: str = os.getenv("SMTP_SERVER")
     SMTP_PORT: int = int(os.getenv("SMTP_PORT", 587))
     SMTP_USER: str = os.getenv("SMTP_USER")
-    SMTP_PASSWORD: str = os.getenv("SMTP_PASSWORD")
\ No newline at end of file
+    SMTP_PASSWORD: str = os.getenv("SMTP_PASSWORD")
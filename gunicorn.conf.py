@@ -0,0 +1,40 @@
+# Production launcher: gunicorn -c gunicorn.conf.py main:app
+#
+# - One uvicorn worker per CPU core (override with WEB_CONCURRENCY)
+# - The app is imported once in the master and forked into the workers (preload_app)
+# - Schema creation, the search index backfill, static precompression and template compilation run once, in the master,
+#   before forking
+# - On SIGTERM workers stop accepting connections and finish in-flight requests (OpenRouter generations included)
+#   for up to GENERATION_DRAIN_SECONDS before being killed
+# - Workers share counters/caches through SHARED_STATE_URL, defaulting to a SQLite file next to the database
+import multiprocessing
+import os
+
+os.environ.setdefault("SHARED_STATE_URL", "sqlite:///./shared_state.db")
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+graceful_timeout = int(float(os.getenv("GENERATION_DRAIN_SECONDS", 120))) + 10
+keepalive = 5
+accesslog = "-"
+
+
+def on_starting(server):
+    from app.compression import precompress_static
+    from app.model_schema.database import engine, init_db
+    from app.page_cache import precompile_templates
+
+    init_db()
+    precompress_static("app/static")
+    precompile_templates()
+    # Connections opened by the master must not be shared with forked workers
+    engine.dispose()
+
+
+def post_fork(server, worker):
+    from app.model_schema.database import engine
+
+    # Drop any pooled connection inherited from the master without closing it under the master's feet
+    engine.dispose(close=False)
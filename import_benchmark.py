@@ -0,0 +1,61 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Cold start check: imports the app in fresh interpreters, the way a new worker or test process does, and fails if
+#   - any dependency that should only load on first use was imported at startup, or
+#   - the median import time is over budget
+# Run before merging anything that adds imports to the app: python import_benchmark.py --budget-ms 1500
+
+ENTRYPOINT = "main"
+DEFERRED_MODULES = ("openai", "markdown", "passlib", "jose", "smtplib", "numpy", "pyarrow")
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {entrypoint}
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{"ms": elapsed, "loaded": [m for m in {deferred!r} if m in sys.modules]}}))
+"""
+
+
+def measure(runs: int, entrypoint: str = ENTRYPOINT):
+    root = os.path.dirname(os.path.abspath(__file__))
+    probe = PROBE.format(entrypoint=entrypoint, deferred=DEFERRED_MODULES)
+    timings, loaded = [], set()
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", probe], cwd=root, capture_output=True, text=True, check=True,
+        ).stdout.strip().splitlines()[-1]
+        result = json.loads(out)
+        timings.append(result["ms"])
+        loaded.update(result["loaded"])
+    return timings, sorted(loaded)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Measure how long a fresh process takes to import the app.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", 1500)))
+    parser.add_argument("--entrypoint", default=ENTRYPOINT)
+    args = parser.parse_args(argv)
+
+    timings, loaded = measure(args.runs, args.entrypoint)
+    median = statistics.median(timings)
+    print(f"import {args.entrypoint}: median {median:.0f} ms, min {min(timings):.0f} ms over {args.runs} runs (budget {args.budget_ms:.0f} ms)")
+
+    failed = False
+    if loaded:
+        print(f"FAIL: loaded at import time, should be deferred to first use: {', '.join(loaded)}")
+        failed = True
+    if median > args.budget_ms:
+        print(f"FAIL: over the import time budget by {median - args.budget_ms:.0f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
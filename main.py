@@ -1,24 +1,43 @@
+import asyncio
+import logging
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 import uvicorn
 from contextlib import asynccontextmanager
 
 from app.model_schema.database import init_db, shutdown_db
+from app.lifecycle import generations_in_flight
+from app.compression import CompressionMiddleware, PrecompressedStaticFiles, precompress_static
+from app.page_cache import precompile_templates
 from app.routes import router
+from app.stars import run_like_flusher
+from config import Config as conf
+
+logger = logging.getLogger(__name__)
 
 # Run on app startup
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     init_db()
+    precompress_static("app/static")
+    precompile_templates()
+    like_flusher = asyncio.create_task(run_like_flusher(conf.LIKES_FLUSH_SECONDS))
     try:
         yield
     finally:
+        if not await generations_in_flight.drain(conf.GENERATION_DRAIN_SECONDS):
+            logger.warning("Shutting down with %d generations still in flight", generations_in_flight.count)
+        like_flusher.cancel()
+        try:
+            await like_flusher # the flusher writes any remaining deltas before exiting
+        except asyncio.CancelledError:
+            pass
         shutdown_db()
 
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(CompressionMiddleware, minimum_size=1024) # br/gzip for '/api/' responses
 app.include_router(router)
-app.mount("/static", StaticFiles(directory="app/static", check_dir=True), name="static")
+app.mount("/static", PrecompressedStaticFiles(directory="app/static", check_dir=True), name="static")
 
 
 # if __name__ == "__main__":